@@ -5,18 +5,52 @@ Includes mandatory compliance, semantic matching, criteria-based scoring, and co
 """
 
 import json
+import re
 import numpy as np
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import util
 from openai import OpenAI
 from dotenv import load_dotenv
 import os
 from collections import defaultdict
 from dataclasses import dataclass, asdict
+from functools import lru_cache
+from util import get_http_client, load_json, load_sentence_model, save_json
+from llm_cache import LLMResponseCache, DEFAULT_CACHE_DIR
 
 
-@dataclass
+# Number of texts per SentenceTransformer forward pass
+ENCODE_BATCH_SIZE = 64
+
+# Keywords used to bucket requirements into scoring categories
+REQUIREMENT_CATEGORIES = {
+    "technical": ["technical", "technology", "system", "software", "hardware", "architecture"],
+    "financial": ["cost", "price", "budget", "financial", "payment", "fee"],
+    "experience": ["experience", "expertise", "qualification", "past", "history", "portfolio"],
+    "methodology": ["methodology", "approach", "process", "procedure", "method", "workflow"]
+}
+
+# One compiled, case-insensitive alternation per category (substring semantics)
+CATEGORY_PATTERNS = {
+    category: re.compile("|".join(map(re.escape, keywords)), re.IGNORECASE)
+    for category, keywords in REQUIREMENT_CATEGORIES.items()
+}
+
+
+@lru_cache(maxsize=4096)
+def categorize_requirement(text: str) -> Tuple[str, ...]:
+    """
+    Categories whose keywords appear in a requirement.
+    Cached: the same RFP requirements are categorized again for every vendor.
+    """
+    return tuple(
+        category for category, pattern in CATEGORY_PATTERNS.items()
+        if pattern.search(text)
+    )
+
+
+@dataclass(slots=True)
 class ScoreBreakdown:
     """Detailed score breakdown for a single criterion."""
     criterion_name: str
@@ -28,7 +62,7 @@ class ScoreBreakdown:
     gaps: List[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class VendorScore:
     """Complete vendor scoring result."""
     vendor_name: str
@@ -75,7 +109,8 @@ class VendorScorer:
         embedding_model: str = "all-MiniLM-L6-v2",
         openai_model: str = "gpt-4o-mini",
         compliance_threshold: float = 0.75,
-        api_key: Optional[str] = None
+        api_key: Optional[str] = None,
+        cache_dir: Optional[str] = DEFAULT_CACHE_DIR
     ):
         """
         Initialize the scoring system.
@@ -85,8 +120,9 @@ class VendorScorer:
             openai_model: OpenAI model for advanced evaluation
             compliance_threshold: Threshold for semantic matching (0-1)
             api_key: OpenAI API key (loads from env if None)
+            cache_dir: Directory of cached model responses (None disables caching)
         """
-        self.embedding_model = SentenceTransformer(embedding_model)
+        self.embedding_model_name = embedding_model
         self.compliance_threshold = compliance_threshold
         self.openai_model = openai_model
         
@@ -96,11 +132,71 @@ class VendorScorer:
             api_key = os.getenv("OPENAI_API_KEY")
         
         if api_key:
-            self.openai_client = OpenAI(api_key=api_key)
+            self.openai_client = OpenAI(api_key=api_key, http_client=get_http_client())
         else:
             self.openai_client = None
             print("⚠️  OpenAI client not initialized - advanced scoring features disabled")
+        
+        self.cache = LLMResponseCache(cache_dir) if cache_dir else None
     
+    def _chat_json(self, prompt: str, temperature: float, max_tokens: int) -> Dict:
+        """
+        Send a single-prompt chat request and parse its JSON answer.
+        Identical temperature-0 requests (same model, prompt and settings)
+        are answered from the response cache; only answers that parse are
+        cached. Sampled requests (temperature > 0) always go to the API.
+        """
+        messages = [{"role": "user", "content": prompt}]
+        params = {"temperature": temperature, "max_tokens": max_tokens}
+        cacheable = self.cache is not None and temperature == 0
+        cache_key = self.cache.make_key(self.openai_model, messages, **params) if cacheable else None
+        
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return json.loads(cached)
+        
+        response = self.openai_client.chat.completions.create(
+            model=self.openai_model,
+            messages=messages,
+            **params
+        )
+        content = response.choices[0].message.content
+        result = json.loads(content)
+        if cache_key:
+            self.cache.set(cache_key, content)
+        return result
+
+    @property
+    def embedding_model(self):
+        """SentenceTransformer, loaded on first use and shared across scorers."""
+        return load_sentence_model(self.embedding_model_name)
+
+    # ============================================================
+    # EMBEDDING HELPERS
+    # ============================================================
+
+    def _encode(self, texts: List[str]):
+        """Encode a list of texts in one batched forward pass."""
+        return self.embedding_model.encode(
+            texts,
+            convert_to_tensor=True,
+            batch_size=ENCODE_BATCH_SIZE,
+            show_progress_bar=False
+        )
+
+    def _max_similarities(self, texts: List[str], corpus_embs) -> List[float]:
+        """
+        Best cosine similarity of each text against a pre-encoded corpus.
+
+        Scores are floored at 0.0, matching the previous per-pair loop.
+        """
+        if not texts:
+            return []
+        text_embs = self._encode(texts)
+        sims = util.cos_sim(text_embs, corpus_embs)
+        return sims.max(dim=1).values.clamp(min=0.0).tolist()
+
     # ============================================================
     # MANDATORY COMPLIANCE CHECK
     # ============================================================
@@ -135,20 +231,14 @@ class VendorScorer:
         if not vendor_statements:
             return False, mandatory_reqs, 0.0
         
-        # Check each mandatory requirement
+        # Check each mandatory requirement against all vendor statements at once
         missing = []
         matched = 0
-        
-        for req in mandatory_reqs:
-            req_emb = self.embedding_model.encode(req, convert_to_tensor=True)
-            
-            # Compare with all vendor statements
-            max_similarity = 0.0
-            for statement in vendor_statements:
-                stmt_emb = self.embedding_model.encode(statement, convert_to_tensor=True)
-                similarity = util.cos_sim(req_emb, stmt_emb).item()
-                max_similarity = max(max_similarity, similarity)
-            
+
+        stmt_embs = self._encode(vendor_statements)
+        max_similarities = self._max_similarities(mandatory_reqs, stmt_embs)
+
+        for req, max_similarity in zip(mandatory_reqs, max_similarities):
             if max_similarity >= self.compliance_threshold:
                 matched += 1
             else:
@@ -183,47 +273,26 @@ class VendorScorer:
                 "overall": 0.0
             }
         
-        # Categorize requirements
-        categories = {
-            "technical": ["technical", "technology", "system", "software", "hardware", "architecture"],
-            "financial": ["cost", "price", "budget", "financial", "payment", "fee"],
-            "experience": ["experience", "expertise", "qualification", "past", "history", "portfolio"],
-            "methodology": ["methodology", "approach", "process", "procedure", "method", "workflow"]
-        }
-        
         category_scores = {}
         vendor_statements = [cap["text"] for cap in vendor_capabilities]
-        
-        for category, keywords in categories.items():
-            # Filter requirements by category
-            category_reqs = [
-                req["text"] for req in rfp_requirements
-                if any(kw in req["text"].lower() for kw in keywords)
-            ]
-            
+        stmt_embs = self._encode(vendor_statements)
+
+        # Bucket requirements by category in a single pass
+        reqs_by_category = {category: [] for category in CATEGORY_PATTERNS}
+        for req in rfp_requirements:
+            for category in categorize_requirement(req["text"]):
+                reqs_by_category[category].append(req["text"])
+
+        for category, category_reqs in reqs_by_category.items():
             if not category_reqs:
                 category_scores[category] = 50.0  # Neutral score if no requirements in category
                 continue
             
-            # Calculate average similarity
-            total_similarity = 0.0
-            count = 0
-            
-            for req in category_reqs:
-                req_emb = self.embedding_model.encode(req, convert_to_tensor=True)
-                
-                # Find best match from vendor
-                best_match = 0.0
-                for statement in vendor_statements:
-                    stmt_emb = self.embedding_model.encode(statement, convert_to_tensor=True)
-                    similarity = util.cos_sim(req_emb, stmt_emb).item()
-                    best_match = max(best_match, similarity)
-                
-                total_similarity += best_match
-                count += 1
-            
+            # Average of each requirement's best vendor match
+            best_matches = self._max_similarities(category_reqs, stmt_embs)
+
             # Convert to 0-100 scale
-            avg_similarity = total_similarity / count if count > 0 else 0.0
+            avg_similarity = float(np.mean(best_matches)) if best_matches else 0.0
             category_scores[category] = avg_similarity * 100
         
         # Calculate overall score
@@ -290,14 +359,7 @@ Return ONLY valid JSON in this exact format:
 """
         
         try:
-            response = self.openai_client.chat.completions.create(
-                model=self.openai_model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.2,
-                max_tokens=2000
-            )
-            
-            result = json.loads(response.choices[0].message.content)
+            result = self._chat_json(prompt, temperature=0, max_tokens=2000)
             
             # Convert to ScoreBreakdown objects
             breakdowns = []
@@ -389,14 +451,7 @@ Be specific and evidence-based. Return ONLY valid JSON:
 """
         
         try:
-            response = self.openai_client.chat.completions.create(
-                model=self.openai_model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-                max_tokens=1000
-            )
-            
-            result = json.loads(response.choices[0].message.content)
+            result = self._chat_json(prompt, temperature=0, max_tokens=1000)
             return result.get("strengths", []), result.get("weaknesses", [])
             
         except Exception as e:
@@ -700,8 +755,7 @@ Be specific and evidence-based. Return ONLY valid JSON:
                 output_path.mkdir(parents=True, exist_ok=True)
                 
                 result_file = output_path / f"{vendor_name}_score.json"
-                with open(result_file, "w", encoding="utf-8") as f:
-                    json.dump(score.to_dict(), f, indent=2, ensure_ascii=False)
+                save_json(score.to_dict(), result_file)
                 
                 print(f"   💾 Saved score to {result_file}")
                 
@@ -722,8 +776,7 @@ Be specific and evidence-based. Return ONLY valid JSON:
             }
         }
         
-        with open(summary_file, "w", encoding="utf-8") as f:
-            json.dump(summary, f, indent=2, ensure_ascii=False)
+        save_json(summary, summary_file)
         
         print(f"\n💾 Saved scoring summary to {summary_file}")
         print("\n" + "=" * 60)
@@ -734,8 +787,7 @@ Be specific and evidence-based. Return ONLY valid JSON:
     
     def _load_requirements_from_analysis(self, analysis_file: str) -> List[Dict]:
         """Load requirements/capabilities from analysis JSON."""
-        with open(analysis_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = load_json(analysis_file)
         
         requirements = []
         for chunk in data:
@@ -749,8 +801,7 @@ Be specific and evidence-based. Return ONLY valid JSON:
         if not chunks_file or not Path(chunks_file).exists():
             return ""
         
-        with open(chunks_file, "r", encoding="utf-8") as f:
-            chunks = json.load(f)
+        chunks = load_json(chunks_file)
         
         texts = [
             chunk.get("contextualized_text") or chunk.get("text", "")
@@ -791,8 +842,7 @@ if __name__ == "__main__":
     # Load criteria if provided
     criteria = None
     if args.criteria:
-        with open(args.criteria, "r") as f:
-            criteria = json.load(f)
+        criteria = load_json(args.criteria)
     
     # Run scorer
     scorer = VendorScorer()
@@ -3,14 +3,17 @@ RFP Comparative Chatbot (Compliance-Aware)
 Tiny safe enhancements – NO pipeline conflicts.
 """
 
-import json
 import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 import numpy as np
 import faiss
 from openai import OpenAI
 from dotenv import load_dotenv
 from pathlib import Path
 from typing import List, Dict, Optional
+from util import get_http_client, load_json
 
 
 # -----------------------------
@@ -21,6 +24,37 @@ DEFAULT_OPENAI_MODEL = "gpt-4o-mini"
 DEFAULT_TOP_K = 8
 DEFAULT_MAX_TOKENS = 2000
 COMPLIANCE_DIR = "outputs/compliance"
+QUERY_EMBEDDING_CACHE_SIZE = 2048
+SEMANTIC_CACHE_THRESHOLD = 0.95   # cosine similarity for a near-duplicate query
+SEMANTIC_CACHE_SIZE = 512       # entries per vector store / compliance state
+SEMANTIC_CACHE_SCOPES = 8       # vector store / compliance states kept at once
+
+# Flat indexes above this size are converted to HNSW for sublinear search
+HNSW_MIN_VECTORS = 5000
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 80
+HNSW_EF_SEARCH = 64
+
+
+# Invariant part of the system prompt. Kept byte-identical across requests
+# and sent first so OpenAI's automatic prompt caching can reuse the prefix.
+SYSTEM_PROMPT = """
+You are EVAL — an advanced RFP Evaluation Assistant.
+You analyze RFPs and vendor responses with evidence-based reasoning.
+
+Capabilities:
+• Access to RFP chunks
+• Access to vendor chunks
+• Awareness of vendor compliance/disqualification
+• Ability to compare compliant vendors only unless requested otherwise
+
+Rules:
+1. Mandatory requirements override all other considerations.
+2. Disqualified vendors must be excluded from comparisons unless explicitly asked.
+3. Always cite evidence from the retrieved chunks.
+4. Maintain an expert, objective tone.
+
+"""
 
 
 # -----------------------------
@@ -46,12 +80,11 @@ def load_compliance_results(folder: str = COMPLIANCE_DIR) -> Dict[str, Dict]:
     for file in folder_path.glob("*_compliance.json"):
         vendor_name = file.stem.replace("_compliance", "")
         try:
-            with open(file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                results[vendor_name] = {
-                    "compliant": data.get("compliant", False),
-                    "missing_requirements": data.get("missing_requirements", []),
-                }
+            data = load_json(file)
+            results[vendor_name] = {
+                "compliant": data.get("compliant", False),
+                "missing_requirements": data.get("missing_requirements", []),
+            }
         except Exception as e:
             print(f"⚠️ Error loading {file.name}: {e}")
 
@@ -62,6 +95,147 @@ def load_compliance_results(folder: str = COMPLIANCE_DIR) -> Dict[str, Dict]:
 
     return results
 
+def load_search_index(vector_db_file: str):
+    """
+    Load a FAISS index for querying.
+    Large flat (brute-force) indexes are converted once to HNSW; the graph
+    is saved next to the original as <file>.hnsw and reused while it is
+    newer than the flat index.
+    """
+    index = faiss.read_index(vector_db_file)
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+        return index
+    if not isinstance(index, faiss.IndexFlat) or index.ntotal <= HNSW_MIN_VECTORS:
+        return index
+
+    hnsw_file = vector_db_file + ".hnsw"
+    if os.path.exists(hnsw_file) and os.path.getmtime(hnsw_file) >= os.path.getmtime(vector_db_file):
+        hnsw_index = faiss.read_index(hnsw_file)
+    else:
+        print(f"🔧 Building HNSW index for {index.ntotal} vectors...")
+        hnsw_index = faiss.IndexHNSWFlat(index.d, HNSW_M, index.metric_type)
+        hnsw_index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        hnsw_index.add(index.reconstruct_n(0, index.ntotal))
+        faiss.write_index(hnsw_index, hnsw_file)
+
+    hnsw_index.hnsw.efSearch = HNSW_EF_SEARCH
+    return hnsw_index
+
+
+@lru_cache(maxsize=4)
+def _load_vector_store_cached(vector_db_file: str, metadata_file: str,
+                              index_mtime: float, metadata_mtime: float) -> tuple:
+    index = load_search_index(vector_db_file)
+    metadata = load_json(metadata_file)
+    return index, metadata
+
+
+def load_vector_store(vector_db_file: str, metadata_file: str) -> tuple:
+    """
+    Load (index, metadata), reusing the in-memory copy while neither file
+    has changed on disk. Rebuilt embeddings get a new mtime and are reloaded.
+    """
+    vector_db_file = os.path.abspath(vector_db_file)
+    metadata_file = os.path.abspath(metadata_file)
+    return _load_vector_store_cached(
+        vector_db_file,
+        metadata_file,
+        os.path.getmtime(vector_db_file),
+        os.path.getmtime(metadata_file),
+    )
+
+
+# -----------------------------
+# Query embedding cache
+# -----------------------------
+# Shared across chatbot instances: the web app builds a new chatbot per
+# request, so a per-instance cache would never hit.
+_query_embedding_cache: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+_query_embedding_lock = threading.Lock()
+
+
+def _normalize_query(query: str) -> str:
+    """Cache key form of a query: case- and whitespace-insensitive."""
+    return " ".join(query.lower().split())
+
+
+# -----------------------------
+# Semantic query cache
+# -----------------------------
+class SemanticQueryCache:
+    """
+    Remembers retrieval results (and answers) of past queries.
+    A new query whose embedding has cosine similarity >= threshold with a
+    cached query, at the same top_k, reuses that entry. When full, the
+    oldest entries are evicted first. Thread-safe.
+    """
+
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 max_entries: int = SEMANTIC_CACHE_SIZE):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.index = None
+        self.entries: "OrderedDict[int, Dict]" = OrderedDict()  # id -> entry, oldest first
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(vec: np.ndarray) -> np.ndarray:
+        vec = np.array(vec, dtype="float32", copy=True).reshape(1, -1)
+        faiss.normalize_L2(vec)
+        return vec
+
+    def lookup(self, vec: np.ndarray, top_k: int) -> Optional[Dict]:
+        unit = self._unit(vec)
+        with self._lock:
+            if self.index is None or self.index.ntotal == 0:
+                return None
+            sims, ids = self.index.search(unit, min(4, self.index.ntotal))
+            for sim, i in zip(sims[0], ids[0]):
+                if i < 0 or sim < self.threshold:
+                    break
+                entry = self.entries.get(int(i))
+                if entry is not None and entry["top_k"] == top_k:
+                    return entry
+        return None
+
+    def add(self, vec: np.ndarray, top_k: int, chunks: List[Dict]) -> Dict:
+        unit = self._unit(vec)
+        entry = {"top_k": top_k, "chunks": chunks, "answer": None}
+        with self._lock:
+            if self.index is None:
+                self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(unit.shape[1]))
+            while len(self.entries) >= self.max_entries:
+                oldest_id, _ = self.entries.popitem(last=False)
+                self.index.remove_ids(np.array([oldest_id], dtype="int64"))
+            entry_id = self._next_id
+            self._next_id += 1
+            self.index.add_with_ids(unit, np.array([entry_id], dtype="int64"))
+            self.entries[entry_id] = entry
+        return entry
+
+
+# Shared across chatbot instances (the web app builds a new chatbot per
+# request). One cache per vector store version and compliance state, so a
+# rebuilt index or a newly disqualified vendor never serves stale results.
+_semantic_caches: "OrderedDict[tuple, SemanticQueryCache]" = OrderedDict()
+_semantic_caches_lock = threading.Lock()
+
+
+def get_semantic_cache(scope: tuple) -> SemanticQueryCache:
+    """Shared SemanticQueryCache for scope (least recently used scopes are dropped)."""
+    with _semantic_caches_lock:
+        cache = _semantic_caches.get(scope)
+        if cache is None:
+            cache = _semantic_caches[scope] = SemanticQueryCache()
+            if len(_semantic_caches) > SEMANTIC_CACHE_SCOPES:
+                _semantic_caches.popitem(last=False)
+        else:
+            _semantic_caches.move_to_end(scope)
+        return cache
+
+
 # -----------------------------
 # Chatbot Class
 # -----------------------------
@@ -83,22 +257,31 @@ class RFPChatbot:
             if not api_key:
                 raise ValueError("OPENAI_API_KEY not found.")
 
-        self.client = OpenAI(api_key=api_key)
+        self.client = OpenAI(api_key=api_key, http_client=get_http_client())
         self.embedding_model = embedding_model
         self.openai_model = openai_model
         self.top_k = top_k
         self.max_tokens = max_tokens
 
-        # Load FAISS
-        self.index = faiss.read_index(vector_db_file)
-
-        # Load metadata
-        with open(metadata_file, "r", encoding="utf-8") as f:
-            self.metadata = json.load(f)
+        # Load FAISS index + metadata (shared while the files are unchanged)
+        self.index, self.metadata = load_vector_store(vector_db_file, metadata_file)
 
         # Load compliance info
         self.compliance_results = load_compliance_results(compliance_dir)
 
+        # Disqualified vendors section of the system prompt
+        self.disqualified_info = self._build_disqualified_info()
+
+        # Near-duplicate query cache, shared by chatbots over the same vector
+        # store files (path + mtime), compliance state and answer settings
+        store_version = tuple(
+            (os.path.abspath(path), os.path.getmtime(path))
+            for path in (vector_db_file, metadata_file)
+        )
+        self.semantic_cache = get_semantic_cache(
+            (store_version, self.disqualified_info, embedding_model, openai_model, max_tokens)
+        )
+
         print(f"✅ FAISS index loaded with {self.index.ntotal} vectors")
         print(f"✅ Metadata loaded: {len(self.metadata)} entries")
         print(f"🚦 Compliance-aware retrieval active")
@@ -106,23 +289,83 @@ class RFPChatbot:
     # -----------------------------
     # Retrieval
     # -----------------------------
+    def _embed_query(self, query: str) -> np.ndarray:
+        """Embed a query, reusing the vector of a previously seen identical question."""
+        return self._embed_queries([query])[0]
+
+    def _embed_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Embed several queries as an (N, d) array.
+        Cached queries are reused; the rest go out in a single embeddings request.
+        """
+        keys = [(self.embedding_model, self.index.d, _normalize_query(q)) for q in queries]
+        vecs: List[Optional[np.ndarray]] = [None] * len(queries)
+        with _query_embedding_lock:
+            for i, key in enumerate(keys):
+                cached = _query_embedding_cache.get(key)
+                if cached is not None:
+                    _query_embedding_cache.move_to_end(key)
+                    vecs[i] = cached
+
+        missing = {}
+        for i, key in enumerate(keys):
+            if vecs[i] is None:
+                missing.setdefault(key, []).append(i)
+
+        if missing:
+            first = [positions[0] for positions in missing.values()]
+            # Ask for vectors of the index's size (the index may hold shortened embeddings)
+            kwargs = {"dimensions": self.index.d} if self.embedding_model.startswith("text-embedding-3") else {}
+            data = self.client.embeddings.create(
+                model=self.embedding_model,
+                input=[queries[i] for i in first],
+                **kwargs
+            ).data
+            with _query_embedding_lock:
+                for (key, positions), item in zip(missing.items(), data):
+                    vec = np.asarray(item.embedding, dtype="float32")
+                    for i in positions:
+                        vecs[i] = vec
+                    _query_embedding_cache[key] = vec
+                    if len(_query_embedding_cache) > QUERY_EMBEDDING_CACHE_SIZE:
+                        _query_embedding_cache.popitem(last=False)
+
+        return np.stack(vecs)
+
     def retrieve_chunks(self, query: str, top_k: Optional[int] = None) -> List[Dict]:
         """Retrieve relevant chunks, skipping non-compliant vendors."""
         if top_k is None:
             top_k = self.top_k
 
-        # Embed query
-        emb = self.client.embeddings.create(
-            model=self.embedding_model,
-            input=query
-        ).data[0].embedding
+        query_vec = self._embed_query(query)
+        cached = self.semantic_cache.lookup(query_vec, top_k)
+        if cached is not None:
+            return cached["chunks"]
 
-        query_vec = np.array([emb], dtype="float32")
-        distances, indices = self.index.search(query_vec, top_k * 3)
+        results = self._search(query_vec[None, :], top_k)[0]
+        self.semantic_cache.add(query_vec, top_k, results)
+        return results
 
+    def _search(self, query_vecs: np.ndarray, top_k: int) -> List[List[Dict]]:
+        """Search the index; per query keep up to top_k chunks from compliant sources."""
+        if self.index.metric_type == faiss.METRIC_INNER_PRODUCT:
+            # Cosine index: stored vectors are unit length, so queries must be too
+            query_vecs = np.array(query_vecs, dtype="float32", copy=True)
+            faiss.normalize_L2(query_vecs)
+        distances, indices = self.index.search(query_vecs, top_k * 3)
+        # Convert to plain Python numbers once rather than per element
+        return [
+            self._filter_hits(row_distances, row_indices, top_k)
+            for row_distances, row_indices in zip(distances.tolist(), indices.tolist())
+        ]
+
+    def _filter_hits(self, distances: List[float], indices: List[int], top_k: int) -> List[Dict]:
+        """Turn one row of FAISS hits into chunk dicts."""
         results = []
-        for j, idx in enumerate(indices[0]):
-            if idx >= len(self.metadata):
+        n_meta = len(self.metadata)
+        for distance, idx in zip(distances, indices):
+            # FAISS pads missing neighbours with -1
+            if idx < 0 or idx >= n_meta:
                 continue
 
             meta = self.metadata[idx]
@@ -145,7 +388,7 @@ class RFPChatbot:
                 "label": label,
                 "vendor_name": vendor_name,
                 "source_type": source_type,
-                "distance": float(distances[0][j]),
+                "distance": distance,
                 "index": idx,
             })
 
@@ -157,13 +400,8 @@ class RFPChatbot:
     # -----------------------------
     # Prompt Construction
     # -----------------------------
-    def _build_prompts(self, query: str, chunks: List[Dict]) -> tuple:
-        context = "\n\n".join(
-            f"[{c['label']} - Chunk {c['index']}]\n{c['chunk']}"
-            for c in chunks
-        )
-
-        # Disqualified vendors section
+    def _build_disqualified_info(self) -> str:
+        """Describe disqualified vendors; fixed for the chatbot's lifetime."""
         disqualified_info = ""
         disqualified = [
             v for v, r in self.compliance_results.items()
@@ -178,25 +416,16 @@ class RFPChatbot:
                 for m in missing[:3]:
                     disqualified_info += f"   - {m}\n"
             disqualified_info += "\n"
+        return disqualified_info
 
-        system_prompt = f"""
-You are EVAL — an advanced RFP Evaluation Assistant.
-You analyze RFPs and vendor responses with evidence-based reasoning.
-
-Capabilities:
-• Access to RFP chunks
-• Access to vendor chunks
-• Awareness of vendor compliance/disqualification
-• Ability to compare compliant vendors only unless requested otherwise
-
-Rules:
-1. Mandatory requirements override all other considerations.
-2. Disqualified vendors must be excluded from comparisons unless explicitly asked.
-3. Always cite evidence from the retrieved chunks.
-4. Maintain an expert, objective tone.
+    def _build_prompts(self, query: str, chunks: List[Dict]) -> tuple:
+        context = "\n\n".join(
+            f"[{c['label']} - Chunk {c['index']}]\n{c['chunk']}"
+            for c in chunks
+        )
 
-{disqualified_info}
-"""
+        # Static instructions first so the provider can cache the prompt prefix
+        system_prompt = SYSTEM_PROMPT + self.disqualified_info + "\n"
 
         user_prompt = f"""
 Context:
@@ -241,9 +470,24 @@ Provide a precise, structured answer based ONLY on the above context.
     # Public Interface
     # -----------------------------
     def query(self, query: str, stream: bool = True, top_k: Optional[int] = None) -> tuple:
+        if top_k is None:
+            top_k = self.top_k
+
+        # Near-duplicate of an already answered question: skip retrieval and GPT
+        query_vec = self._embed_query(query)
+        cached = self.semantic_cache.lookup(query_vec, top_k)
+        if cached is not None and cached["answer"] is not None:
+            if stream:
+                print(cached["answer"] + "\n")
+            return cached["answer"], cached["chunks"]
+
         chunks = self.retrieve_chunks(query, top_k)
         system_prompt, user_prompt = self._build_prompts(query, chunks)
         answer = self._ask_gpt(system_prompt, user_prompt, stream)
+
+        entry = self.semantic_cache.lookup(query_vec, top_k)
+        if entry is not None:
+            entry["answer"] = answer
         return answer, chunks
 
     # -----------------------------
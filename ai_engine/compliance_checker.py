@@ -3,10 +3,15 @@ compliance_checker.py
 Flexible semantic compliance checker for RFP mandatory requirements.
 """
 
-import json
+import os
 from pathlib import Path
 from typing import Dict, List
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import util
+from util import load_json, load_sentence_model, save_json
+
+
+# Number of texts per SentenceTransformer forward pass
+ENCODE_BATCH_SIZE = 64
 
 
 class ComplianceChecker:
@@ -25,15 +30,54 @@ class ComplianceChecker:
             model_name: SentenceTransformer model name.
             threshold: semantic similarity threshold for compliance.
         """
-        self.model = SentenceTransformer(model_name)
+        self.model_name = model_name
         self.threshold = threshold
+        # (rfp_file, mtime) -> (mandatory requirement texts, their embeddings)
+        self._rfp_cache = {}
+
+    @property
+    def model(self):
+        """SentenceTransformer, loaded on first use and shared across checkers."""
+        return load_sentence_model(self.model_name)
+
+    def _encode(self, texts: List[str]):
+        """Batch-encode texts into a single tensor."""
+        return self.model.encode(
+            texts,
+            batch_size=ENCODE_BATCH_SIZE,
+            convert_to_tensor=True,
+            show_progress_bar=False
+        )
 
     # ----------------------------------------------------
     # Helper: Load JSON
     # ----------------------------------------------------
     def load_json(self, file_path: str) -> List[Dict]:
-        with open(file_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return load_json(file_path)
+
+    # ----------------------------------------------------
+    # Helper: RFP mandatory requirements (loaded + encoded once)
+    # ----------------------------------------------------
+    def _mandatory_requirements(self, rfp_file: str) -> tuple:
+        """
+        Mandatory requirement texts of an RFP and their embeddings.
+        Every vendor is checked against the same RFP, so both are cached
+        until the file changes.
+        """
+        key = (os.path.abspath(rfp_file), os.path.getmtime(rfp_file))
+        if key not in self._rfp_cache:
+            rfp_data = self.load_json(rfp_file)
+
+            # Extract MANDATORY requirements
+            mandatory_reqs = [
+                req["text"]
+                for chunk in rfp_data
+                for req in chunk.get("requirements", [])
+                if req.get("type") == "mandatory"
+            ]
+            req_embs = self._encode(mandatory_reqs) if mandatory_reqs else None
+            self._rfp_cache = {key: (mandatory_reqs, req_embs)}
+        return self._rfp_cache[key]
 
     # ----------------------------------------------------
     # Check compliance for a single vendor
@@ -43,17 +87,9 @@ class ComplianceChecker:
         Compare vendor capability statements to RFP mandatory requirements.
         Returns compliance dict.
         """
-        rfp_data = self.load_json(rfp_file)
+        mandatory_reqs, req_embs = self._mandatory_requirements(rfp_file)
         vendor_data = self.load_json(vendor_file)
 
-        # Extract MANDATORY requirements
-        mandatory_reqs = [
-            req["text"]
-            for chunk in rfp_data
-            for req in chunk.get("requirements", [])
-            if req.get("type") == "mandatory"
-        ]
-
         # Extract ALL vendor statements
         vendor_caps = [
             req["text"]
@@ -64,16 +100,16 @@ class ComplianceChecker:
         matched = []
         missing = []
 
-        for req in mandatory_reqs:
-            req_emb = self.model.encode(req, convert_to_tensor=True)
-            sims = []
-
-            for cap in vendor_caps:
-                cap_emb = self.model.encode(cap, convert_to_tensor=True)
-                sims.append(util.cos_sim(req_emb, cap_emb).item())
+        # Best vendor match per requirement: encode each side once, one similarity matrix
+        if mandatory_reqs and vendor_caps:
+            cap_embs = self._encode(vendor_caps)
+            best = util.cos_sim(req_embs, cap_embs).max(dim=1).values.tolist()
+        else:
+            best = [float("-inf")] * len(mandatory_reqs)
 
+        for req, score in zip(mandatory_reqs, best):
             # Determine if requirement matched
-            if sims and max(sims) >= self.threshold:
+            if score >= self.threshold:
                 matched.append(req)
             else:
                 missing.append(req)
@@ -113,8 +149,7 @@ class ComplianceChecker:
 
             # Save vendor compliance JSON
             vendor_out = output_path / f"{vendor_name}_compliance.json"
-            with open(vendor_out, "w", encoding="utf-8") as f:
-                json.dump(result, f, indent=4, ensure_ascii=False)
+            save_json(result, vendor_out)
 
         print("\n✅ Compliance evaluation complete!")
         return summary
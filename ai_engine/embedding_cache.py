@@ -0,0 +1,117 @@
+"""
+Embedding Cache
+Content-addressed on-disk cache of embedding vectors (SQLite).
+Identical texts embedded with the same model and dimensions are only sent
+to the API once, across runs and across RFP/vendor documents.
+"""
+
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Union
+import numpy as np
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+DEFAULT_CACHE_FILE = "outputs/cache/embeddings.sqlite"
+SQLITE_MAX_PARAMS = 500  # keys per SELECT ... IN (...) query
+
+
+def cache_key(model: str, dimensions: Optional[int], text: str) -> str:
+    """Hash of everything that determines an embedding."""
+    payload = f"{model}\0{dimensions or ''}\0{text}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class EmbeddingCache:
+    """Maps (model, dimensions, text) to a float32 vector stored as a BLOB."""
+
+    def __init__(self, db_path: Union[str, Path] = DEFAULT_CACHE_FILE):
+        """
+        Args:
+            db_path: SQLite database file (created if missing)
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: Sequence[str]) -> dict:
+        """
+        Look up several keys at once.
+
+        Returns:
+            {key: np.ndarray} for the keys present in the cache
+        """
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), SQLITE_MAX_PARAMS):
+                part = list(keys[i:i + SQLITE_MAX_PARAMS])
+                placeholders = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", part
+                )
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype="float32")
+        return found
+
+    def put_many(self, items: Sequence[tuple]):
+        """
+        Store (key, vector) pairs.
+        """
+        rows = [(key, np.asarray(vec, dtype="float32").tobytes()) for key, vec in items]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows
+            )
+            self._conn.commit()
+
+    def get_or_compute_many(self,
+                            texts: Sequence[str],
+                            model: str,
+                            compute: Callable[[List[str]], List],
+                            dimensions: Optional[int] = None) -> List[Optional[np.ndarray]]:
+        """
+        Return one vector per text, computing only the cache misses.
+
+        Args:
+            texts: Texts to embed
+            model: Embedding model name (part of the key)
+            compute: Called once with the list of missed texts; returns one
+                vector (or None on failure) per text, in order
+            dimensions: Requested output dimensions (part of the key)
+
+        Returns:
+            List aligned with texts; None where compute failed
+        """
+        keys = [cache_key(model, dimensions, t) for t in texts]
+        found = self.get_many(keys)
+        vectors: List[Optional[np.ndarray]] = [found.get(k) for k in keys]
+
+        missing = [i for i, vec in enumerate(vectors) if vec is None]
+        print(f"💾 Embedding cache: {len(texts) - len(missing)} hits, {len(missing)} misses")
+        if not missing:
+            return vectors
+
+        computed = compute([texts[i] for i in missing])
+        new_items = []
+        for i, vec in zip(missing, computed):
+            if vec is None:
+                continue
+            vectors[i] = np.asarray(vec, dtype="float32")
+            new_items.append((keys[i], vectors[i]))
+        self.put_many(new_items)
+        return vectors
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
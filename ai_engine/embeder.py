@@ -5,14 +5,16 @@ Skips non-compliant vendors based on compliance_checker results.
 Stores embeddings in FAISS index with metadata.
 """
 
-import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
 import numpy as np
 import faiss
 from openai import OpenAI
 from dotenv import load_dotenv
+from embedding_cache import EmbeddingCache, DEFAULT_CACHE_FILE
+from util import MAX_RETRIES, get_http_client, load_json, save_json
 
 
 # -----------------------------
@@ -20,18 +22,34 @@ from dotenv import load_dotenv
 # -----------------------------
 DEFAULT_EMBEDDING_MODEL = "text-embedding-3-large"
 COMPLIANCE_DIR = "outputs/compliance"  # Default folder where compliance results are stored
+# "flat" (exact L2), "cosine" (exact inner product on unit vectors),
+# "hnsw" (approximate cosine graph) or "sq8" (int8 scalar-quantized L2, 4x smaller)
+DEFAULT_INDEX_TYPE = "flat"
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+# text-embedding-3 models can return shortened vectors (None = model's full size)
+DEFAULT_EMBEDDING_DIMENSIONS = 1024
+# Per-request limits: the API accepts up to 2048 inputs / 300k tokens per call
+DEFAULT_BATCH_SIZE = 128
+MAX_BATCH_TOKENS = 250_000
+# Concurrent embedding requests (I/O bound; bounded by the account's rate limits)
+DEFAULT_EMBED_WORKERS = 8
 
 
 class DocumentEmbedder:
     """Handles document embedding and FAISS index creation."""
     
-    def __init__(self, api_key: str = None, model: str = DEFAULT_EMBEDDING_MODEL):
+    def __init__(self, api_key: str = None, model: str = DEFAULT_EMBEDDING_MODEL,
+                 dimensions: int = DEFAULT_EMBEDDING_DIMENSIONS,
+                 cache_file: Optional[str] = DEFAULT_CACHE_FILE):
         """
         Initialize the embedder.
         
         Args:
             api_key: OpenAI API key (if None, loads from environment)
             model: OpenAI embedding model to use
+            dimensions: Output vector size for text-embedding-3 models (None = full size)
+            cache_file: SQLite embedding cache path (None disables caching)
         """
         if api_key is None:
             load_dotenv()
@@ -39,45 +57,123 @@ class DocumentEmbedder:
             if not api_key:
                 raise ValueError("OpenAI API key not found. Set OPENAI_API_KEY in environment or pass as parameter.")
         
-        self.client = OpenAI(api_key=api_key)
+        self.client = OpenAI(api_key=api_key, max_retries=MAX_RETRIES,
+                             http_client=get_http_client())
         self.model = model
+        # Older models (ada-002) reject the dimensions parameter
+        self.dimensions = dimensions if model.startswith("text-embedding-3") else None
+        self.cache = EmbeddingCache(cache_file) if cache_file else None
     
     def embed_text(self, text: str) -> List[float]:
         """
         Generate embedding for a single text.
         """
-        response = self.client.embeddings.create(model=self.model, input=text)
-        return response.data[0].embedding
+        return self.embed_batch([text])[0]
     
-    def embed_texts(self, texts: List[str], batch_size: int = 100) -> np.ndarray:
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
         """
-        Generate embeddings for multiple texts in batches.
+        Generate embeddings for a list of texts with a single API request.
+        """
+        kwargs = {"dimensions": self.dimensions} if self.dimensions else {}
+        response = self.client.embeddings.create(model=self.model, input=texts, **kwargs)
+        return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+    
+    @staticmethod
+    def make_batches(texts: List[str], batch_size: int = DEFAULT_BATCH_SIZE,
+                     max_tokens: int = MAX_BATCH_TOKENS) -> List[List[str]]:
+        """
+        Split texts into request-sized batches.
+        A batch is closed at batch_size texts or when its estimated token
+        count (~4 characters per token) would exceed max_tokens.
         """
+        batches = []
+        batch, batch_tokens = [], 0
+        for text in texts:
+            tokens = len(text) // 4 + 1
+            if batch and (len(batch) >= batch_size or batch_tokens + tokens > max_tokens):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(text)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+    
+    def _embed_batch_or_each(self, batch: List[str]) -> List[Optional[List[float]]]:
+        """
+        Embed one batch; if the request fails, retry its texts one by one
+        so a single bad input only drops itself (None in the result).
+        """
+        try:
+            return self.embed_batch(batch)
+        except Exception as e:
+            print(f"⚠️ Batch request failed ({e}); embedding texts individually")
+        
         embeddings = []
-        total = len(texts)
+        for text in batch:
+            try:
+                embeddings.append(self.embed_text(text))
+            except Exception as e:
+                print(f"⚠️ Skipping one text due to error: {e}")
+                embeddings.append(None)
+        return embeddings
+    
+    def _request_embeddings(self, texts: List[str], batch_size: int,
+                            max_workers: int) -> List[Optional[List[float]]]:
+        """Embed texts via the API, one vector (or None) per text in input order."""
+        batches = self.make_batches(texts, batch_size)
+        print(f"🔹 Embedding {len(texts)} texts in {len(batches)} batches "
+              f"({min(max_workers, len(batches) or 1)} concurrent requests)...")
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(self._embed_batch_or_each, batches))
+        return [emb for batch in results for emb in batch]
+    
+    def embed_texts(self, texts: List[str], batch_size: int = DEFAULT_BATCH_SIZE,
+                    max_workers: int = DEFAULT_EMBED_WORKERS) -> np.ndarray:
+        """
+        Generate embeddings for multiple texts in batches.
+        Each batch is one API request; up to max_workers requests run
+        concurrently and results keep the input order. Duplicate texts are
+        embedded once, and texts already in the embedding cache are not
+        sent to the API. Row i is always texts[i]: if any text cannot be
+        embedded, a RuntimeError is raised.
+        """
+        def compute(missing: List[str]) -> List[Optional[List[float]]]:
+            return self._request_embeddings(missing, batch_size, max_workers)
         
-        for i in range(0, total, batch_size):
-            batch = texts[i:min(i + batch_size, total)]
-            print(f"🔹 Embedding batch {i//batch_size + 1}/{(total + batch_size - 1)//batch_size}...")
-            for text in batch:
-                try:
-                    embedding = self.embed_text(text)
-                    embeddings.append(embedding)
-                except Exception as e:
-                    print(f"⚠️ Skipping one text due to error: {e}")
+        # Repeated boilerplate (headers, footers, shared clauses) is embedded once
+        position = {}
+        inverse = [position.setdefault(text, len(position)) for text in texts]
+        unique_texts = list(position)
+        if len(unique_texts) < len(texts):
+            print(f"🔁 {len(texts) - len(unique_texts)} duplicate texts will reuse embeddings")
         
-        return np.array(embeddings).astype("float32")
+        if self.cache is not None:
+            vectors = self.cache.get_or_compute_many(unique_texts, self.model, compute, self.dimensions)
+        else:
+            vectors = compute(unique_texts)
+        
+        # Row i must be text i (callers write metadata per text), so a text
+        # that could not be embedded fails the run instead of shifting rows.
+        # Successful vectors are cached, so a rerun only retries the failures.
+        failed = sum(1 for i in inverse if vectors[i] is None)
+        if failed:
+            raise RuntimeError(f"{failed} of {len(texts)} texts could not be embedded; rerun to retry them")
+        if not texts:
+            return np.array([], dtype="float32")
+        
+        # Write rows straight into one float32 matrix (no list-of-rows + astype copies)
+        embeddings = np.empty((len(texts), len(vectors[inverse[0]])), dtype="float32")
+        for row, i in enumerate(inverse):
+            embeddings[row] = vectors[i]
+        return embeddings
 
 
 # -----------------------------
 # Helper functions
 # -----------------------------
 
-def load_json(file_path: str) -> List[Dict]:
-    with open(file_path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
 def load_compliance_results(folder: str = COMPLIANCE_DIR) -> Dict[str, bool]:
     """
     Load vendor compliance results (True = compliant, False = non-compliant).
@@ -105,8 +201,36 @@ def load_chunks_from_json(file_path: str) -> List[Dict]:
     """
     Load chunks from a JSON file.
     """
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return load_json(file_path)
+
+
+def build_faiss_index(embeddings: np.ndarray, index_type: str = DEFAULT_INDEX_TYPE) -> faiss.Index:
+    """
+    Build a FAISS index over the embeddings.
+    
+    "flat" stores full fp32 vectors; "sq8" stores each dimension as int8,
+    cutting index memory (and bytes scanned per search) by 4x while
+    queries stay fp32. "cosine" and "hnsw" L2-normalize the embeddings
+    (in place) and rank by inner product; the chatbot normalizes queries
+    for these indexes.
+    """
+    dimension = embeddings.shape[1]
+    if index_type == "flat":
+        index = faiss.IndexFlatL2(dimension)
+    elif index_type == "cosine":
+        faiss.normalize_L2(embeddings)
+        index = faiss.IndexFlatIP(dimension)
+    elif index_type == "hnsw":
+        faiss.normalize_L2(embeddings)
+        index = faiss.IndexHNSWFlat(dimension, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    elif index_type == "sq8":
+        index = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_L2)
+        index.train(embeddings)
+    else:
+        raise ValueError(f"Unsupported index type: {index_type}")
+    index.add(embeddings)
+    return index
 
 
 # -----------------------------
@@ -118,7 +242,9 @@ def create_embeddings_and_index(chunk_files: List[str],
                                 metadata_file: str,
                                 compliance_results: Dict[str, bool] = None,
                                 api_key: str = None,
-                                model: str = DEFAULT_EMBEDDING_MODEL) -> tuple:
+                                model: str = DEFAULT_EMBEDDING_MODEL,
+                                index_type: str = DEFAULT_INDEX_TYPE,
+                                dimensions: int = DEFAULT_EMBEDDING_DIMENSIONS) -> tuple:
     """
     Create embeddings and FAISS index from multiple chunk files, 
     skipping non-compliant vendors.
@@ -159,19 +285,24 @@ def create_embeddings_and_index(chunk_files: List[str],
 
 
     # Generate embeddings
-    embedder = DocumentEmbedder(api_key=api_key, model=model)
+    embedder = DocumentEmbedder(api_key=api_key, model=model, dimensions=dimensions)
     print(f"✨ Generating embeddings using model: {model}")
     embeddings = embedder.embed_texts(chunks_text)
 
     # Create FAISS index
     dimension = embeddings.shape[1]
-    index = faiss.IndexFlatL2(dimension)
-    index.add(embeddings)
+    index = build_faiss_index(embeddings, index_type)
 
     # Save FAISS index
     faiss.write_index(index, vector_db_file)
     print(f"✅ FAISS index saved: {vector_db_file}")
 
+    # Raw vectors (same order as metadata) for consumers that want them without
+    # going through FAISS: np.load(path, mmap_mode="r")
+    vectors_file = str(Path(vector_db_file).with_suffix(".npy"))
+    np.save(vectors_file, embeddings)
+    print(f"✅ Embedding vectors saved: {vectors_file}")
+
     # Save metadata
     metadata = []
     for c in all_chunks:
@@ -183,8 +314,7 @@ def create_embeddings_and_index(chunk_files: List[str],
             "headings": c.get("headings", []),
         })
 
-    with open(metadata_file, "w", encoding="utf-8") as f:
-        json.dump(metadata, f, ensure_ascii=False, indent=2)
+    save_json(metadata, metadata_file, indent=2)
     print(f"✅ Metadata saved: {metadata_file}")
 
     print(f"\n🎯 Embedded {len(chunks_text)} total chunks | Dimension: {dimension}")
@@ -198,7 +328,9 @@ def create_embeddings_from_rfp_and_vendors(rfp_chunks_file: str,
                                            metadata_name: str = "chunks_metadata.json",
                                            compliance_dir: str = COMPLIANCE_DIR,
                                            api_key: str = None,
-                                           model: str = DEFAULT_EMBEDDING_MODEL) -> tuple:
+                                           model: str = DEFAULT_EMBEDDING_MODEL,
+                                           index_type: str = DEFAULT_INDEX_TYPE,
+                                           dimensions: int = DEFAULT_EMBEDDING_DIMENSIONS) -> tuple:
     """
     Create embeddings from RFP and vendor chunk files, skipping non-compliant vendors.
     """
@@ -230,7 +362,9 @@ def create_embeddings_from_rfp_and_vendors(rfp_chunks_file: str,
         metadata_file,
         compliance_results=compliance_results,
         api_key=api_key,
-        model=model
+        model=model,
+        index_type=index_type,
+        dimensions=dimensions
     )
 
 
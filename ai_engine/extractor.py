@@ -3,12 +3,27 @@ RFP and Vendor Response Analysis Extractor
 Analyzes chunks using OpenAI to extract requirements, capabilities, and evaluation labels.
 """
 
+import hashlib
 import json
 import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Literal
+from typing import Iterator, List, Dict, Literal, Optional
 from openai import OpenAI
 from dotenv import load_dotenv
+from util import (
+    COMPLETION_TOKENS_ESTIMATE,
+    MAX_RETRIES,
+    RateLimiter,
+    count_tokens_estimate,
+    get_http_client,
+    load_json,
+    save_json,
+    shared_rate_limiter,
+)
+from llm_cache import LLMResponseCache, DEFAULT_CACHE_DIR
 
 
 # ----------------------------
@@ -16,12 +31,96 @@ from dotenv import load_dotenv
 # ----------------------------
 DEFAULT_MODEL = "gpt-4o-mini"
 DEFAULT_TEMPERATURE = 0
+DEFAULT_MAX_WORKERS = 8  # concurrent chunk analyses (I/O bound)
+DEFAULT_DOCUMENT_WORKERS = 4  # documents (RFP + vendors) analyzed at the same time
+DEFAULT_PACK_SIZE = 1  # chunks per request; >1 trades tokens for fewer requests (RPM-bound runs)
+PACK_MAX_TOKENS = 6000  # estimated chunk tokens per packed request
+
+# Structured output: the API constrains decoding to this schema, so answers
+# always parse and match the structure the rest of the pipeline reads
+_ANALYSIS_PROPERTIES = {
+    "requirements": {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {
+                "text": {"type": "string"},
+                "type": {"type": "string", "enum": ["mandatory", "optional", "informational"]},
+            },
+            "required": ["text", "type"],
+            "additionalProperties": False,
+        },
+    },
+    "summary": {"type": "string"},
+    "evaluation_labels": {"type": "array", "items": {"type": "string"}},
+}
+
+CHUNK_ANALYSIS_SCHEMA = {
+    "name": "chunk_analysis",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": _ANALYSIS_PROPERTIES,
+        "required": ["requirements", "summary", "evaluation_labels"],
+        "additionalProperties": False,
+    },
+}
+
+PACKED_ANALYSIS_SCHEMA = {
+    "name": "packed_chunk_analysis",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "results": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {"id": {"type": "integer"}, **_ANALYSIS_PROPERTIES},
+                    "required": ["id", "requirements", "summary", "evaluation_labels"],
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": ["results"],
+        "additionalProperties": False,
+    },
+}
+
+# Batch API (offline mode)
+BATCH_POLL_INTERVAL = 30  # seconds
+BATCH_FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+# Numbered single-line RFP chunks shorter than this with no obligation cue
+# (e.g. "3.2 Scope of Work") are treated as bare headings and not sent to the model
+HEADING_MAX_WORDS = 8
+OBLIGATION_CUES = ("must", "shall", "required", "should", "will", "recommended", "preferred")
+NUMBERED_HEADING_RE = re.compile(r"\d+(?:\.\d+)*\.?\s+\w")
+
+
+def is_heading_only(chunk_text: str, prompt_type: Literal["RFP", "Vendor"] = "RFP") -> bool:
+    """
+    True for empty chunks and, in RFP analysis, short numbered headings
+    like "1. Scope". Short vendor lines ("ISO 27001 certified") are claims,
+    not headings, so in Vendor analysis only empty chunks are skipped.
+    """
+    text = chunk_text.strip()
+    if not text:
+        return True
+    if prompt_type != "RFP" or "\n" in text or not NUMBERED_HEADING_RE.match(text):
+        return False
+    words = text.lower().split()
+    if len(words) >= HEADING_MAX_WORDS:
+        return False
+    return not any(cue in words for cue in OBLIGATION_CUES)
 
 
 class ChunkAnalyzer:
     """Analyzes document chunks using OpenAI API."""
     
-    def __init__(self, api_key: str = None, model: str = DEFAULT_MODEL, temperature: float = DEFAULT_TEMPERATURE):
+    def __init__(self, api_key: str = None, model: str = DEFAULT_MODEL, temperature: float = DEFAULT_TEMPERATURE,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 cache_dir: Optional[str] = DEFAULT_CACHE_DIR):
         """
         Initialize the analyzer.
         
@@ -29,6 +128,8 @@ class ChunkAnalyzer:
             api_key: OpenAI API key (if None, loads from environment)
             model: OpenAI model to use
             temperature: Model temperature setting
+            rate_limiter: RPM/TPM limiter (defaults to the process-wide one)
+            cache_dir: Directory of cached model responses (None disables caching)
         """
         if api_key is None:
             load_dotenv()
@@ -36,33 +137,36 @@ class ChunkAnalyzer:
             if not api_key:
                 raise ValueError("OpenAI API key not found. Set OPENAI_API_KEY in environment or pass as parameter.")
         
-        self.client = OpenAI(api_key=api_key)
+        self.client = OpenAI(api_key=api_key, max_retries=MAX_RETRIES,
+                             http_client=get_http_client())
         self.model = model
         self.temperature = temperature
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.cache = LLMResponseCache(cache_dir) if cache_dir else None
     
-    def analyze_chunk(self, chunk_text: str, prompt_type: Literal["RFP", "Vendor"] = "RFP") -> Dict:
-        """
-        Analyze a single chunk of text.
-        
-        Args:
-            chunk_text: Text content to analyze
-            prompt_type: Type of analysis ("RFP" or "Vendor")
-            
-        Returns:
-            Dictionary containing analysis results
-        """
+    @staticmethod
+    def _role_description(prompt_type: Literal["RFP", "Vendor"]) -> str:
         if prompt_type == "RFP":
-            role_description = (
+            return (
                 "You are an expert in analyzing government and corporate RFPs. "
                 "Your task is to extract all explicit and implied requirements."
             )
-        else:
-            role_description = (
-                "You are an expert analyzing vendor proposals in response to RFPs. "
-                "Extract all capabilities, commitments, or deliverables mentioned by the vendor."
-            )
+        return (
+            "You are an expert analyzing vendor proposals in response to RFPs. "
+            "Extract all capabilities, commitments, or deliverables mentioned by the vendor."
+        )
+    
+    def _build_messages(self, chunk_text: str, prompt_type: Literal["RFP", "Vendor"]) -> List[Dict]:
+        """
+        Chat messages for analyzing one chunk.
+        
+        The instructions go in a system message that is byte-identical for
+        every chunk of a prompt type, so the API can serve that prefix from
+        its prompt cache; only the user message changes per chunk.
+        """
+        role_description = self._role_description(prompt_type)
         
-        prompt = f"""
+        instructions = f"""
         {role_description}
 
         Instructions:
@@ -86,32 +190,372 @@ class ChunkAnalyzer:
         - "mandatory" if it contains strong obligation cues (must, shall, required to)
         - "optional" if it uses softer language (should, recommended, preferred)
         - "informational" for background or context info.
-
-        Now analyze:
-        {chunk_text}
         """
+        return [
+            {"role": "system", "content": instructions},
+            {"role": "user", "content": f"Now analyze:\n{chunk_text}"},
+        ]
+    
+    def _build_packed_messages(self, chunk_texts: List[str], prompt_type: Literal["RFP", "Vendor"]) -> List[Dict]:
+        """Chat messages for analyzing several chunks in one request."""
+        role_description = self._role_description(prompt_type)
+        chunks_block = "\n\n".join(
+            f"[Chunk {i}]\n{chunk_text}" for i, chunk_text in enumerate(chunk_texts)
+        )
+        
+        instructions = f"""
+        {role_description}
+
+        Analyze each chunk below independently. For every chunk:
+        1. Extract key actionable points or requirements.
+        2. Summarize the text in 2–3 sentences under "summary".
+        3. Identify key focus areas under "evaluation_labels" (e.g., Technical, Financial, Compliance).
 
+        Return valid JSON with one entry per chunk, using the chunk number as "id":
+        {{
+          "results": [
+           {{
+            "id": 0,
+            "requirements": [
+             {{
+              "text": "",
+              "type": "mandatory | optional | informational"
+             }}
+            ],
+            "summary": "",
+            "evaluation_labels": []
+           }}
+          ]
+        }}
+
+        Classify as:
+        - "mandatory" if it contains strong obligation cues (must, shall, required to)
+        - "optional" if it uses softer language (should, recommended, preferred)
+        - "informational" for background or context info.
+        """
+        return [
+            {"role": "system", "content": instructions},
+            {"role": "user", "content": f"Chunks:\n{chunks_block}"},
+        ]
+    
+    def _request_params(self, schema: Dict = CHUNK_ANALYSIS_SCHEMA) -> Dict:
+        """Request parameters other than model and messages."""
+        return {
+            "temperature": self.temperature,
+            "response_format": {"type": "json_schema", "json_schema": schema},
+        }
+    
+    def _cache_key(self, messages: List[Dict]) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return self.cache.make_key(self.model, messages, **self._request_params())
+    
+    def _cached_result(self, cache_key: Optional[str]) -> Optional[Dict]:
+        """Parsed cached response for this request, if any."""
+        if cache_key is None:
+            return None
+        content = self.cache.get(cache_key)
+        return self._parse_output(content) if content is not None else None
+    
+    @staticmethod
+    def _heading_result(chunk_text: str) -> Dict:
+        """Result for a chunk that is only a heading (no model call)."""
+        return {
+            "requirements": [],
+            "summary": chunk_text.strip(),
+            "evaluation_labels": [],
+            "raw_model_output": ""
+        }
+    
+    @staticmethod
+    def _empty_result(content: str = "") -> Dict:
+        """Result for a chunk whose analysis failed (retried on the next run)."""
+        return {
+            "requirements": [],
+            "summary": "",
+            "evaluation_labels": [],
+            "raw_model_output": content or "",
+            "analysis_failed": True
+        }
+    
+    def _parse_output(self, content: str, cache_key: Optional[str] = None) -> Dict:
+        """
+        Parse the model's JSON answer; fall back to an empty result.
+        Answers that parse are stored under cache_key; failures are not
+        cached so the next run retries them.
+        """
+        try:
+            chunk_output = json.loads(content)
+        except Exception as e:
+            print(f"⚠️ Error analyzing chunk: {e}")
+            return self._empty_result(content)
+        if cache_key is not None:
+            self.cache.set(cache_key, content)
+        chunk_output["raw_model_output"] = content
+        return chunk_output
+    
+    def analyze_chunk(self, chunk_text: str, prompt_type: Literal["RFP", "Vendor"] = "RFP") -> Dict:
+        """
+        Analyze a single chunk of text.
+        
+        Args:
+            chunk_text: Text content to analyze
+            prompt_type: Type of analysis ("RFP" or "Vendor")
+            
+        Returns:
+            Dictionary containing analysis results
+        """
+        # Nothing to extract from a bare heading; skip the API call
+        if is_heading_only(chunk_text, prompt_type):
+            return self._heading_result(chunk_text)
+        
+        messages = self._build_messages(chunk_text, prompt_type)
+        cache_key = self._cache_key(messages)
+        cached = self._cached_result(cache_key)
+        if cached is not None:
+            return cached
         
         try:
+            self.rate_limiter.acquire(
+                sum(count_tokens_estimate(m["content"]) for m in messages) + COMPLETION_TOKENS_ESTIMATE
+            )
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=self.temperature
+                messages=messages,
+                **self._request_params()
             )
             content = response.choices[0].message.content
-            chunk_output = json.loads(content)
         except Exception as e:
             print(f"⚠️ Error analyzing chunk: {e}")
-            chunk_output = {
-                "requirements": [],
-                "summary": "",
-                "evaluation_labels": [],
-                "raw_model_output": content if 'content' in locals() else ""
-            }
-        else:
-            chunk_output["raw_model_output"] = content
+            return self._empty_result()
         
-        return chunk_output
+        return self._parse_output(content, cache_key)
+    
+    @staticmethod
+    def _split_packed_output(content: Optional[str], count: int) -> Dict[int, Dict]:
+        """Per-chunk results of a packed answer, keyed by chunk number."""
+        try:
+            entries = json.loads(content)["results"]
+        except Exception as e:
+            print(f"⚠️ Error parsing packed analysis: {e}")
+            return {}
+        
+        results = {}
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            try:
+                i = int(entry.pop("id"))
+            except (KeyError, TypeError, ValueError):
+                continue
+            if 0 <= i < count:
+                entry.setdefault("requirements", [])
+                entry.setdefault("summary", "")
+                entry.setdefault("evaluation_labels", [])
+                entry["raw_model_output"] = json.dumps(entry, ensure_ascii=False)
+                results[i] = entry
+        return results
+    
+    def analyze_chunks_packed(self, chunk_texts: List[str],
+                              prompt_type: Literal["RFP", "Vendor"] = "RFP") -> List[Dict]:
+        """
+        Analyze several chunks with a single chat request.
+        
+        Trades tokens for request count when a run is bound by requests per
+        minute. Chunks the model leaves out of its answer are analyzed
+        individually, so the result always has one entry per chunk.
+        
+        Args:
+            chunk_texts: Chunk texts to analyze together
+            prompt_type: Type of analysis ("RFP" or "Vendor")
+            
+        Returns:
+            List of analysis results (in chunk order)
+        """
+        results: List[Optional[Dict]] = [None] * len(chunk_texts)
+        pending = []
+        for i, chunk_text in enumerate(chunk_texts):
+            if is_heading_only(chunk_text, prompt_type):
+                results[i] = self._heading_result(chunk_text)
+            else:
+                pending.append(i)
+        
+        if len(pending) == 1:
+            results[pending[0]] = self.analyze_chunk(chunk_texts[pending[0]], prompt_type)
+        elif pending:
+            messages = self._build_packed_messages([chunk_texts[i] for i in pending], prompt_type)
+            params = self._request_params(PACKED_ANALYSIS_SCHEMA)
+            cache_key = self.cache.make_key(self.model, messages, **params) if self.cache else None
+            content = self.cache.get(cache_key) if cache_key else None
+            from_cache = content is not None
+            
+            if content is None:
+                try:
+                    self.rate_limiter.acquire(
+                        sum(count_tokens_estimate(m["content"]) for m in messages)
+                        + COMPLETION_TOKENS_ESTIMATE * len(pending)
+                    )
+                    response = self.client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        **params
+                    )
+                    content = response.choices[0].message.content
+                except Exception as e:
+                    print(f"⚠️ Error analyzing packed chunks: {e}")
+            
+            entries = self._split_packed_output(content, len(pending)) if content else {}
+            if cache_key and not from_cache and len(entries) == len(pending):
+                self.cache.set(cache_key, content)
+            
+            for j, i in enumerate(pending):
+                entry = entries.get(j)
+                results[i] = entry if entry is not None else self.analyze_chunk(chunk_texts[i], prompt_type)
+        
+        return results
+    
+    def analyze_chunks_batch_api(self, chunk_texts: List[str],
+                                 prompt_type: Literal["RFP", "Vendor"] = "RFP",
+                                 poll_interval: int = BATCH_POLL_INTERVAL) -> List[Dict]:
+        """
+        Analyze chunks through the OpenAI Batch API (offline, discounted).
+        
+        All chunk requests are uploaded as one JSONL file and processed as a
+        single batch job; this call polls until the job finishes (up to the
+        24h completion window). Results match analyze_chunk's format and
+        chunk order.
+        
+        Args:
+            chunk_texts: Chunk texts to analyze
+            prompt_type: Type of analysis ("RFP" or "Vendor")
+            poll_interval: Seconds between status checks
+            
+        Returns:
+            List of analysis results
+        """
+        results: List[Optional[Dict]] = [None] * len(chunk_texts)
+        cache_keys: Dict[int, Optional[str]] = {}
+        lines = []
+        for i, chunk_text in enumerate(chunk_texts):
+            if is_heading_only(chunk_text, prompt_type):
+                results[i] = self._heading_result(chunk_text)
+                continue
+            messages = self._build_messages(chunk_text, prompt_type)
+            cache_keys[i] = self._cache_key(messages)
+            results[i] = self._cached_result(cache_keys[i])
+            if results[i] is not None:
+                continue
+            lines.append(json.dumps({
+                "custom_id": f"chunk-{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.model,
+                    "messages": messages,
+                    **self._request_params(),
+                },
+            }, ensure_ascii=False))
+        
+        if lines:
+            input_file = self.client.files.create(
+                file=("chunk_requests.jsonl", "\n".join(lines).encode("utf-8")),
+                purpose="batch"
+            )
+            batch = self.client.batches.create(
+                input_file_id=input_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            print(f"📦 Submitted batch {batch.id} with {len(lines)} requests")
+            
+            while batch.status not in BATCH_FINAL_STATUSES:
+                time.sleep(poll_interval)
+                batch = self.client.batches.retrieve(batch.id)
+                counts = batch.request_counts
+                done = f" ({counts.completed}/{counts.total})" if counts else ""
+                print(f"   ⏳ Batch status: {batch.status}{done}")
+            
+            if batch.status != "completed":
+                raise RuntimeError(f"Batch {batch.id} ended with status '{batch.status}'")
+            
+            if batch.output_file_id:
+                output = self.client.files.content(batch.output_file_id).text
+                for line in output.splitlines():
+                    if not line.strip():
+                        continue
+                    item = json.loads(line)
+                    i = int(item["custom_id"].split("-", 1)[1])
+                    body = (item.get("response") or {}).get("body") or {}
+                    choices = body.get("choices") or []
+                    content = choices[0]["message"]["content"] if choices else ""
+                    results[i] = self._parse_output(content, cache_keys.get(i))
+        
+        # Requests that failed inside the batch have no output line
+        return [r if r is not None else self._empty_result() for r in results]
+
+
+def pack_chunks(chunk_texts: List[str], pack_size: int,
+                max_tokens: int = PACK_MAX_TOKENS) -> List[List[int]]:
+    """
+    Group consecutive chunk indices for packed analysis.
+    A group is closed at pack_size chunks or when its estimated tokens
+    would exceed max_tokens (an oversized chunk forms its own group).
+    """
+    groups = []
+    group, group_tokens = [], 0
+    for i, chunk_text in enumerate(chunk_texts):
+        tokens = count_tokens_estimate(chunk_text)
+        if group and (len(group) >= pack_size or group_tokens + tokens > max_tokens):
+            groups.append(group)
+            group, group_tokens = [], 0
+        group.append(i)
+        group_tokens += tokens
+    if group:
+        groups.append(group)
+    return groups
+
+
+CHUNK_DELIMITER = "=" * 60
+
+
+def _finalize_txt_chunk(chunk: str) -> Optional[str]:
+    """Strip a raw piece between delimiters; drop its "CHUNK n" header line."""
+    chunk = chunk.strip()
+    if not chunk:
+        return None
+    lines = chunk.splitlines()
+    if lines and lines[0].startswith("CHUNK"):
+        return "\n".join(lines[1:]).strip()
+    return chunk
+
+
+def iter_chunks_from_txt(file_path: str) -> Iterator[str]:
+    """
+    Yield chunks separated by === markers, reading the file line by line.
+    
+    Equivalent to splitting the whole file on the delimiter, without
+    holding the full file contents and all pieces in memory at once.
+    
+    Args:
+        file_path: Path to the text file
+        
+    Yields:
+        Chunk texts
+    """
+    buffer: List[str] = []
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            # A delimiter can sit anywhere in a line, as with str.split
+            parts = line.split(CHUNK_DELIMITER)
+            buffer.append(parts[0])
+            for part in parts[1:]:
+                text = _finalize_txt_chunk("".join(buffer))
+                if text is not None:
+                    yield text
+                buffer = [part]
+    text = _finalize_txt_chunk("".join(buffer))
+    if text is not None:
+        yield text
 
 
 def read_chunks_from_txt(file_path: str) -> List[str]:
@@ -124,24 +568,7 @@ def read_chunks_from_txt(file_path: str) -> List[str]:
     Returns:
         List of chunk texts
     """
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    chunks = content.split("=" * 60)
-    processed_chunks = []
-    
-    for chunk in chunks:
-        chunk = chunk.strip()
-        if not chunk:
-            continue
-        lines = chunk.splitlines()
-        if lines and lines[0].startswith("CHUNK"):
-            text = "\n".join(lines[1:]).strip()
-        else:
-            text = chunk
-        processed_chunks.append(text)
-    
-    return processed_chunks
+    return list(iter_chunks_from_txt(file_path))
 
 
 def read_chunks_from_json(file_path: str) -> List[Dict]:
@@ -154,13 +581,50 @@ def read_chunks_from_json(file_path: str) -> List[Dict]:
     Returns:
         List of chunk dictionaries
     """
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return load_json(file_path)
+
+
+def checkpoint_path(output_file: str) -> Path:
+    """JSONL file next to output_file holding results as they complete."""
+    output_path = Path(output_file)
+    return output_path.with_name(f"{output_path.stem}.checkpoint.jsonl")
+
+
+def _checkpoint_hash(chunk_text: str, model: str, prompt_type: str) -> str:
+    payload = f"{model}\0{prompt_type}\0{chunk_text}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def load_checkpoint(path: Path, chunk_texts: List[str], model: str,
+                    prompt_type: Literal["RFP", "Vendor"]) -> Dict[int, Dict]:
+    """
+    Results saved by an interrupted run, keyed by chunk index.
+    Entries whose chunk text, model or prompt type changed since (or that
+    are out of range or failed) are ignored, so those chunks run again.
+    """
+    done = {}
+    if not path.exists():
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+                i = entry["index"]
+            except (ValueError, KeyError, TypeError):
+                continue  # torn last line from a crash
+            if not 0 <= i < len(chunk_texts) or entry.get("result", {}).get("analysis_failed"):
+                continue
+            if entry.get("hash") == _checkpoint_hash(chunk_texts[i], model, prompt_type):
+                done[i] = entry["result"]
+    return done
 
 
 def analyze_document_chunks(chunks_file: str, output_file: str, 
                            prompt_type: Literal["RFP", "Vendor"] = "RFP",
-                           api_key: str = None, model: str = DEFAULT_MODEL) -> List[Dict]:
+                           api_key: str = None, model: str = DEFAULT_MODEL,
+                           max_workers: int = DEFAULT_MAX_WORKERS,
+                           use_batch_api: bool = False,
+                           pack_size: int = DEFAULT_PACK_SIZE) -> List[Dict]:
     """
     Analyze all chunks in a document.
     
@@ -170,9 +634,13 @@ def analyze_document_chunks(chunks_file: str, output_file: str,
         prompt_type: Type of analysis ("RFP" or "Vendor")
         api_key: OpenAI API key
         model: OpenAI model to use
+        max_workers: Number of chunks analyzed concurrently
+        use_batch_api: Submit all chunks as one OpenAI Batch API job
+            (cheaper, not interactive: may take up to 24h)
+        pack_size: Chunks analyzed per chat request (synchronous mode only)
         
     Returns:
-        List of analysis results
+        List of analysis results (in chunk order)
     """
     analyzer = ChunkAnalyzer(api_key=api_key, model=model)
     
@@ -189,34 +657,92 @@ def analyze_document_chunks(chunks_file: str, output_file: str,
     
     print(f"📄 Total chunks to analyze: {len(chunk_texts)}")
     
-    results = []
-    for i, chunk_text in enumerate(chunk_texts):
-        print(f"Analyzing chunk {i+1}/{len(chunk_texts)}...")
-        result = analyzer.analyze_chunk(chunk_text, prompt_type)
-        results.append(result)
-    
-    # Save results
     output_path = Path(output_file)
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=4, ensure_ascii=False)
+    # Results are appended to a JSONL checkpoint as they complete, so an
+    # interrupted run resumes with only the chunks that are still missing
+    checkpoint = checkpoint_path(output_file)
+    done = load_checkpoint(checkpoint, chunk_texts, model, prompt_type)
+    pending = [i for i in range(len(chunk_texts)) if i not in done]
+    if done:
+        print(f"♻️ Resuming: {len(done)} chunks already analyzed, {len(pending)} remaining")
+    
+    def analyze(i):
+        print(f"Analyzing chunk {i+1}/{len(chunk_texts)}...")
+        return analyzer.analyze_chunk(chunk_texts[i], prompt_type)
+    
+    def analyze_pack(group):
+        print(f"Analyzing chunks {group[0]+1}-{group[-1]+1}/{len(chunk_texts)}...")
+        return analyzer.analyze_chunks_packed([chunk_texts[i] for i in group], prompt_type)
+    
+    with open(checkpoint, "a", encoding="utf-8") as ckpt:
+        def record(i, result):
+            done[i] = result
+            if result.get("analysis_failed"):
+                return  # not checkpointed: retried on the next run
+            entry = {
+                "index": i,
+                "hash": _checkpoint_hash(chunk_texts[i], model, prompt_type),
+                "result": result,
+            }
+            ckpt.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            ckpt.flush()
+        
+        if use_batch_api and pending:
+            batch_results = analyzer.analyze_chunks_batch_api(
+                [chunk_texts[i] for i in pending], prompt_type
+            )
+            for i, result in zip(pending, batch_results):
+                record(i, result)
+        elif pack_size > 1:
+            pending_texts = [chunk_texts[i] for i in pending]
+            groups = [[pending[j] for j in group] for group in pack_chunks(pending_texts, pack_size)]
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for group, group_results in zip(groups, executor.map(analyze_pack, groups)):
+                    for i, result in zip(group, group_results):
+                        record(i, result)
+        else:
+            # Requests overlap on the network; map() yields in chunk order
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for i, result in zip(pending, executor.map(analyze, pending)):
+                    record(i, result)
+    
+    results = [done[i] for i in range(len(chunk_texts))]
+    
+    # Save results
+    save_json(results, output_file)
+    failed = sum(1 for r in results if r.get("analysis_failed"))
+    if failed:
+        # Keep the checkpoint so a rerun only retries the failed chunks
+        print(f"⚠️ {failed} chunks failed; rerun to retry them (checkpoint kept: {checkpoint})")
+    else:
+        checkpoint.unlink()
     
     print(f"✅ Analysis saved to {output_file}")
     return results
 
 
 def analyze_rfp_and_vendors(rfp_chunks_file: str, vendor_chunks_files: List[tuple],
-                            output_dir: str, api_key: str = None, model: str = DEFAULT_MODEL) -> Dict:
+                            output_dir: str, api_key: str = None, model: str = DEFAULT_MODEL,
+                            use_batch_api: bool = False,
+                            document_workers: int = DEFAULT_DOCUMENT_WORKERS,
+                            pack_size: int = DEFAULT_PACK_SIZE) -> Dict:
     """
     Analyze RFP and multiple vendor response files.
     
+    Documents are independent, so they are analyzed concurrently; all of
+    them draw on the process-wide rate limiter and HTTP connection pool.
+    
     Args:
         rfp_chunks_file: Path to RFP chunks file
         vendor_chunks_files: List of tuples (file_path, vendor_name)
         output_dir: Directory to save analysis results
         api_key: OpenAI API key
         model: OpenAI model to use
+        use_batch_api: Analyze through the OpenAI Batch API (offline runs)
+        document_workers: Number of documents analyzed concurrently
+        pack_size: Chunks analyzed per chat request (synchronous mode only)
         
     Returns:
         Dictionary with RFP and vendor analysis results
@@ -224,32 +750,33 @@ def analyze_rfp_and_vendors(rfp_chunks_file: str, vendor_chunks_files: List[tupl
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
     
-    results = {}
-    
-    # Analyze RFP
-    print("\n📋 Analyzing RFP document...")
-    rfp_output = output_path / "rfp_chunk_analysis.json"
-    rfp_results = analyze_document_chunks(
-        rfp_chunks_file,
-        str(rfp_output),
-        prompt_type="RFP",
-        api_key=api_key,
-        model=model
-    )
-    results["rfp"] = rfp_results
-    
-    # Analyze each vendor
-    results["vendors"] = {}
-    for vendor_file, vendor_name in vendor_chunks_files:
-        print(f"\n🔹 Analyzing vendor: {vendor_name}")
-        vendor_output = output_path / f"{vendor_name}_analysis.json"
-        vendor_results = analyze_document_chunks(
-            vendor_file,
-            str(vendor_output),
-            prompt_type="Vendor",
+    # RFP first (no vendor name), then each vendor
+    jobs = [(rfp_chunks_file, None)] + [(f, name) for f, name in vendor_chunks_files]
+    
+    def analyze(job):
+        chunks_file, vendor_name = job
+        prompt_type = "RFP" if vendor_name is None else "Vendor"
+        if vendor_name is None:
+            print("\n📋 Analyzing RFP document...")
+            output_file = output_path / "rfp_chunk_analysis.json"
+        else:
+            print(f"\n🔹 Analyzing vendor: {vendor_name}")
+            output_file = output_path / f"{vendor_name}_analysis.json"
+        return analyze_document_chunks(
+            chunks_file,
+            str(output_file),
+            prompt_type=prompt_type,
             api_key=api_key,
-            model=model
+            model=model,
+            use_batch_api=use_batch_api,
+            pack_size=pack_size
         )
+    
+    with ThreadPoolExecutor(max_workers=max(1, document_workers)) as executor:
+        document_results = list(executor.map(analyze, jobs))
+    
+    results = {"rfp": document_results[0], "vendors": {}}
+    for (_, vendor_name), vendor_results in zip(vendor_chunks_files, document_results[1:]):
         results["vendors"][vendor_name] = vendor_results
     
     print("\n🎯 All analyses complete!")
@@ -259,11 +786,14 @@ def analyze_rfp_and_vendors(rfp_chunks_file: str, vendor_chunks_files: List[tupl
 if __name__ == "__main__":
     import sys
     
-    if len(sys.argv) > 1:
-        chunks_file = sys.argv[1]
-        output_file = sys.argv[2] if len(sys.argv) > 2 else "analysis.json"
-        prompt_type = sys.argv[3] if len(sys.argv) > 3 else "RFP"
+    use_batch_api = "--batch" in sys.argv
+    args = [a for a in sys.argv[1:] if a != "--batch"]
+    
+    if args:
+        chunks_file = args[0]
+        output_file = args[1] if len(args) > 1 else "analysis.json"
+        prompt_type = args[2] if len(args) > 2 else "RFP"
         
-        analyze_document_chunks(chunks_file, output_file, prompt_type)
+        analyze_document_chunks(chunks_file, output_file, prompt_type, use_batch_api=use_batch_api)
     else:
-        print("Usage: python extractor.py <chunks_file> [output_file] [RFP|Vendor]")
\ No newline at end of file
+        print("Usage: python extractor.py <chunks_file> [output_file] [RFP|Vendor] [--batch]")
\ No newline at end of file
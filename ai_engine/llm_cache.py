@@ -0,0 +1,70 @@
+"""
+LLM Response Cache
+Exact-match on-disk cache of chat completion outputs.
+A request with the same model, settings and messages is answered from disk
+instead of calling the API again, so re-running the pipeline only pays for
+chunks that changed.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+DEFAULT_CACHE_DIR = "outputs/cache/llm"
+
+
+class LLMResponseCache:
+    """Stores one JSON file per request, named by the SHA-256 of the request."""
+
+    def __init__(self, cache_dir: Union[str, Path] = DEFAULT_CACHE_DIR):
+        """
+        Args:
+            cache_dir: Directory for cached responses (created if missing)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict], **params) -> str:
+        """
+        Hash of everything that determines the response.
+
+        Args:
+            model: Model name
+            messages: Chat messages
+            **params: Other request parameters (temperature, response_format, ...)
+        """
+        payload = json.dumps(
+            {"model": model, "messages": messages, **params},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        # Two-level fan-out keeps directories small on large corpora
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached response content, or None on a miss."""
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)["content"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def set(self, key: str, content: str):
+        """Store response content (atomic: concurrent writers never leave partial files)."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"content": content}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
@@ -25,8 +25,8 @@ except Exception as _db_err:
 
 # Import pipeline modules (keep module names as you use them)
 from parser import process_document
-from vendor_parser import process_vendor_response, process_multiple_vendors
-from extractor import analyze_document_chunks, analyze_rfp_and_vendors
+from vendor_parser import process_multiple_vendors
+from extractor import DEFAULT_PACK_SIZE, analyze_document_chunks, analyze_rfp_and_vendors
 from embeder import create_embeddings_from_rfp_and_vendors
 from chatbot import create_chatbot
 from vendor_capability_extractor import VendorCapabilityExtractor
@@ -44,7 +44,8 @@ class RFPAnalysisSystem:
                  max_tokens: int = 1024,
                  project_id: Optional[str] = None,
                  rfp_id: Optional[str] = None,
-                 vendor_doc_ids: Optional[Dict[str, str]] = None):
+                 vendor_doc_ids: Optional[Dict[str, str]] = None,
+                 parse_workers: int = 1):
         """
         Initialize the RFP Analysis System.
         
@@ -56,6 +57,7 @@ class RFPAnalysisSystem:
             project_id: Optional project UUID (for DB integration)
             rfp_id: Optional RFPDocument UUID (for DB integration)
             vendor_doc_ids: Optional mapping {vendor_name: vendor_doc_id} (for DB integration)
+            parse_workers: Vendor documents parsed in parallel processes (1 = sequential)
         """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
@@ -70,6 +72,7 @@ class RFPAnalysisSystem:
         self.api_key = openai_api_key
         self.min_tokens = min_tokens
         self.max_tokens = max_tokens
+        self.parse_workers = parse_workers
 
         # ⭐ DB-related IDs (optional)
         self.project_id = project_id
@@ -183,16 +186,21 @@ class RFPAnalysisSystem:
         
         vendor_results = {}
         
+        # Parse all vendors first (in parallel processes when parse_workers > 1);
+        # a vendor that fails to parse stops the run rather than silently
+        # dropping out of compliance checking and scoring
+        parsed = process_multiple_vendors(
+            vendor_files,
+            self.chunks_dir,
+            self.min_tokens,
+            self.max_tokens,
+            workers=self.parse_workers,
+            raise_on_error=True
+        )
+        
         for vendor_file, vendor_name in vendor_files:
             json_output = self.chunks_dir / f"{vendor_name}_chunks.json"
-            
-            chunks = process_vendor_response(
-                vendor_file,
-                vendor_name,
-                self.chunks_dir,
-                self.min_tokens,
-                self.max_tokens
-            )
+            chunks = parsed[vendor_name]
             
             vendor_results[vendor_name] = {
                 "json": str(json_output),
@@ -240,13 +248,18 @@ class RFPAnalysisSystem:
         
         return vendor_results
     
-    def extract_requirements(self, rfp_json: str, vendor_jsons: List[tuple]) -> Dict:
+    def extract_requirements(self, rfp_json: str, vendor_jsons: List[tuple],
+                             use_batch_api: bool = False,
+                             pack_size: int = DEFAULT_PACK_SIZE) -> Dict:
         """
         Extract requirements and analysis from all documents.
         
         Args:
             rfp_json: Path to RFP chunks JSON
             vendor_jsons: List of tuples (json_path, vendor_name)
+            use_batch_api: Run the analysis as OpenAI Batch API jobs
+                (half price, but results may take up to 24h)
+            pack_size: Chunks analyzed per chat request (ignored with use_batch_api)
             
         Returns:
             Dictionary with analysis results
@@ -259,7 +272,9 @@ class RFPAnalysisSystem:
             rfp_json,
             vendor_jsons,
             str(self.analysis_dir),
-            self.api_key
+            self.api_key,
+            use_batch_api=use_batch_api,
+            pack_size=pack_size
         )
         
         print(f"\n✅ Extraction complete: RFP + {len(results.get('vendors', {}))} vendors analyzed")
@@ -356,7 +371,9 @@ class RFPAnalysisSystem:
                           rfp_file: str, 
                           vendor_files: List[tuple],
                           skip_extraction: bool = False,
-                          run_chatbot: bool = True) -> Dict:
+                          run_chatbot: bool = True,
+                          use_batch_api: bool = False,
+                          pack_size: int = DEFAULT_PACK_SIZE) -> Dict:
         """
         Run the complete pipeline from start to finish with VendorScorer integrated.
         
@@ -365,6 +382,8 @@ class RFPAnalysisSystem:
             vendor_files: List of tuples (file_path, vendor_name)
             skip_extraction: Skip requirement extraction step (faster)
             run_chatbot: Launch interactive chatbot after processing
+            use_batch_api: Extract through the OpenAI Batch API (offline runs)
+            pack_size: Chunks analyzed per extraction request
             
         Returns:
             Dictionary with all results and paths
@@ -391,7 +410,9 @@ class RFPAnalysisSystem:
             vendor_jsons = [(v["json"], name) for name, v in vendor_results.items()]
             extraction_results = self.extract_requirements(
                 rfp_results["json"],
-                vendor_jsons
+                vendor_jsons,
+                use_batch_api=use_batch_api,
+                pack_size=pack_size
             )
             results["extraction"] = extraction_results
         else:
@@ -494,12 +515,32 @@ def main():
         help="Maximum tokens per chunk (default: 1024)"
     )
     
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=1,
+        help="Vendor documents parsed in parallel processes (default: 1)"
+    )
+    
     parser.add_argument(
         "--skip-extraction",
         action="store_true",
         help="Skip requirement extraction step (faster processing)"
     )
     
+    parser.add_argument(
+        "--batch-api",
+        action="store_true",
+        help="Run requirement extraction through the OpenAI Batch API (half cost, results within 24h)"
+    )
+    
+    parser.add_argument(
+        "--pack-size",
+        type=int,
+        default=DEFAULT_PACK_SIZE,
+        help=f"Small chunks packed into one extraction request (default: {DEFAULT_PACK_SIZE})"
+    )
+    
     parser.add_argument(
         "--no-chatbot",
         action="store_true",
@@ -555,7 +596,8 @@ def main():
         max_tokens=args.max_tokens,
         project_id=args.project_id,
         rfp_id=args.rfp_id,
-        vendor_doc_ids=vendor_doc_ids
+        vendor_doc_ids=vendor_doc_ids,
+        parse_workers=args.parse_workers
     )
     
     # Run full pipeline
@@ -563,7 +605,9 @@ def main():
         rfp_file=args.rfp,
         vendor_files=vendor_files,
         skip_extraction=args.skip_extraction,
-        run_chatbot=not args.no_chatbot
+        run_chatbot=not args.no_chatbot,
+        use_batch_api=args.batch_api,
+        pack_size=args.pack_size
     )
     
     # Display vendor scoring dashboard
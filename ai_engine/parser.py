@@ -5,7 +5,6 @@ RFP Hybrid Chunker + Token-based Merge Pass + Text Cleaning
 - Merges small chunks forward until >= MIN_TOKENS or would exceed MAX_TOKENS
 """
 
-import json
 import re
 from pathlib import Path
 from typing import List, Optional, Dict, Any
@@ -13,6 +12,7 @@ from typing import List, Optional, Dict, Any
 from docling.document_converter import DocumentConverter
 from docling.chunking import HybridChunker
 from transformers import AutoTokenizer
+import util
 
 
 # -----------------------
@@ -26,18 +26,25 @@ MAX_TOKENS = 1024
 # -----------------------
 # Cleaning Function
 # -----------------------
+# Compiled once; clean_text runs on every chunk of every document
+_SPACES_RE = re.compile(r"[ \t]+")
+_HYPHEN_BREAK_RE = re.compile(r"-\s*\n\s*")
+_EXTRA_NEWLINES_RE = re.compile(r"\n{3,}")
+_BULLETS_RE = re.compile(r"([•·◦]+)\s*")
+
+
 def clean_text(text: str) -> str:
     """Light & safe cleaning that preserves structure."""
     if not text:
         return ""
     # Remove multiple spaces/tabs
-    text = re.sub(r"[ \t]+", " ", text)
+    text = _SPACES_RE.sub(" ", text)
     # Fix hyphenated word breaks "develop-\nment" → "development"
-    text = re.sub(r"-\s*\n\s*", "", text)
+    text = _HYPHEN_BREAK_RE.sub("", text)
     # Normalize line breaks: allow max 2 in a row
-    text = re.sub(r"\n{3,}", "\n\n", text)
+    text = _EXTRA_NEWLINES_RE.sub("\n\n", text)
     # Remove stray bullet characters
-    text = re.sub(r"([•·◦]+)\s*", "", text)
+    text = _BULLETS_RE.sub("", text)
     return text.strip()
 
 
@@ -54,58 +61,91 @@ def safe_meta(chunk) -> Dict[str, Any]:
         return {}
 
 
-def extract_page_number(chunk) -> Optional[int]:
-    meta = safe_meta(chunk)
-    if "page_number" in meta:
-        return meta["page_number"]
-    for alt in ("page", "page_num", "pg", "page_index", "pageno"):
-        if alt in meta:
-            return meta[alt]
+PAGE_KEYS = ("page_number", "page", "page_num", "pg", "page_index", "pageno")
+HEADING_KEYS = (
+    "heading", "title", "section_title", "heading_text",
+    "h1", "h2", "h3", "name", "section", "caption", "headings"
+)
+
+
+def ancestor_metas(chunk) -> List[Dict[str, Any]]:
+    """
+    Metadata of a chunk followed by that of each of its parents (nearest first).
+    Computed once per chunk and shared by the page and heading lookups.
+    """
+    metas = [safe_meta(chunk)]
     parent = getattr(chunk, "parent", None)
     while parent is not None:
-        pm = safe_meta(parent)
-        if "page_number" in pm:
-            return pm["page_number"]
-        for alt in ("page", "page_num", "pg", "page_index", "pageno"):
-            if alt in pm:
-                return pm[alt]
+        metas.append(safe_meta(parent))
         parent = getattr(parent, "parent", None)
+    return metas
+
+
+def extract_page_number(chunk, metas: Optional[List[Dict[str, Any]]] = None) -> Optional[int]:
+    if metas is None:
+        metas = ancestor_metas(chunk)
+    for meta in metas:
+        for key in PAGE_KEYS:
+            if key in meta:
+                return meta[key]
     return None
 
 
-def get_parent_headings(chunk, max_levels: int = 10) -> List[str]:
-    heading_keys = [
-        "heading", "title", "section_title", "heading_text",
-        "h1", "h2", "h3", "name", "section", "caption", "headings"
-    ]
+def _meta_headings(meta: Dict[str, Any]) -> List[str]:
+    values = []
+    for key in HEADING_KEYS:
+        raw = meta.get(key)
+        if raw:
+            val = " > ".join(v for v in raw) if isinstance(raw, (list, tuple)) else str(raw)
+            val = val.strip()
+            if val:
+                values.append(val)
+    return values
+
+
+def get_parent_headings(chunk, max_levels: int = 10,
+                        metas: Optional[List[Dict[str, Any]]] = None) -> List[str]:
+    if metas is None:
+        metas = ancestor_metas(chunk)
     headings, seen = [], set()
-    meta = safe_meta(chunk)
 
-    for key in heading_keys:
-        if key in meta and meta[key]:
-            val = " > ".join(val for val in meta[key]) if isinstance(meta[key], (list, tuple)) else str(meta[key])
-            val = val.strip()
-            if val and val not in seen:
-                headings.append(val)
-                seen.add(val)
+    for val in _meta_headings(metas[0]):
+        if val not in seen:
+            headings.append(val)
+            seen.add(val)
 
-    parent = getattr(chunk, "parent", None)
-    levels = 0
-    while parent is not None and levels < max_levels:
-        pm = safe_meta(parent)
-        for key in heading_keys:
-            if key in pm and pm[key]:
-                val = " > ".join(val for val in pm[key]) if isinstance(pm[key], (list, tuple)) else str(pm[key])
-                val = val.strip()
-                if val and val not in seen:
-                    headings.insert(0, val)
-                    seen.add(val)
-        parent = getattr(parent, "parent", None)
-        levels += 1
+    for pm in metas[1:max_levels + 1]:
+        for val in _meta_headings(pm):
+            if val not in seen:
+                headings.insert(0, val)
+                seen.add(val)
 
     return headings
 
 
+def count_tokens_batch(tokenizer, texts: List[str]) -> List[int]:
+    """
+    Token counts for many texts with one tokenizer call.
+    Falls back to per-text encode (and word counts) if the batch call fails.
+    """
+    try:
+        encoded = tokenizer(
+            texts,
+            add_special_tokens=False,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+        )
+        return [len(ids) for ids in encoded["input_ids"]]
+    except Exception:
+        counts = []
+        for text in texts:
+            try:
+                counts.append(len(tokenizer.encode(text, add_special_tokens=False)))
+            except Exception:
+                counts.append(max(1, len(text.split())))
+        return counts
+
+
 # -----------------------
 # Chunking + Cleaning
 # -----------------------
@@ -133,29 +173,25 @@ def chunk_document(pdf_path: str, tokenizer, min_tokens: int = MIN_TOKENS,
     raw_chunks = list(chunker.chunk(doc))
     chunk_dicts = []
 
-    for idx, ch in enumerate(raw_chunks):
-        # CLEAN THE TEXT BEFORE token counting & merging
-        raw_text = getattr(ch, "text", "") or ""
-        text = clean_text(raw_text)
+    # CLEAN THE TEXT BEFORE token counting & merging
+    texts = [clean_text(getattr(ch, "text", "") or "") for ch in raw_chunks]
+    # One batched tokenizer call instead of one encode() per chunk
+    token_counts = count_tokens_batch(tokenizer, texts)
 
+    for idx, (ch, text, token_count) in enumerate(zip(raw_chunks, texts, token_counts)):
         try:
             contextual = clean_text(chunker.contextualize(chunk=ch))
         except Exception:
             contextual = text
 
-        try:
-            token_ids = tokenizer.encode(text, add_special_tokens=False)
-            token_count = len(token_ids)
-        except Exception:
-            token_count = max(1, len(text.split()))
-
+        metas = ancestor_metas(ch)
         chunk_dicts.append({
             "orig_index": idx,
             "text": text,
             "contextualized_text": contextual,
             "token_count": token_count,
-            "page_number": extract_page_number(ch),
-            "headings": get_parent_headings(ch),
+            "page_number": extract_page_number(ch, metas),
+            "headings": get_parent_headings(ch, metas=metas),
             "orig_chunk": ch
         })
 
@@ -188,7 +224,7 @@ def merge_small_chunks_forward(chunk_dicts: List[dict],
     def make_buffer_from_chunk(c):
         return {
             "orig_indices": [c["orig_index"]],
-            "text": c["text"],
+            "text_parts": [c["text"]],
             "contextualized_texts": [c["contextualized_text"]],
             "token_count": c["token_count"],
             "pages": [c["page_number"]] if c["page_number"] else [],
@@ -206,7 +242,7 @@ def merge_small_chunks_forward(chunk_dicts: List[dict],
                 seen.add(h)
         return {
             "orig_indices": buf["orig_indices"],
-            "text": buf["text"],
+            "text": "\n\n".join(buf["text_parts"]),
             "contextualized_text": combined_context,
             "token_count": buf["token_count"],
             "page_number": rep_page,
@@ -232,7 +268,7 @@ def merge_small_chunks_forward(chunk_dicts: List[dict],
 
         if tentative <= max_tokens:
             buffer["orig_indices"].append(next_chunk["orig_index"])
-            buffer["text"] += "\n\n" + next_chunk["text"]
+            buffer["text_parts"].append(next_chunk["text"])
             buffer["contextualized_texts"].append(next_chunk["contextualized_text"])
             buffer["token_count"] = tentative
             if next_chunk["page_number"]:
@@ -271,9 +307,8 @@ def save_txt(merged_chunks: List[dict], out_path: str):
 
 
 def save_json(merged_chunks: List[dict], out_path: str):
-    """Save chunks to a JSON file."""
-    with open(out_path, "w", encoding="utf-8") as jf:
-        json.dump(merged_chunks, jf, indent=2, ensure_ascii=False)
+    """Save chunks to a JSON file (orjson when installed)."""
+    util.save_json(merged_chunks, out_path, indent=2)
     print(f"✅ JSON saved: {out_path}")
 
 
@@ -5,10 +5,19 @@ Common utilities for the RFP Analysis System.
 
 import json
 import os
+import threading
+import time
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Dict, Optional, Union
 import hashlib
 
+# Optional fast JSON backend
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 def ensure_dir(directory: Union[str, Path]) -> Path:
     """
@@ -46,11 +55,22 @@ def save_json(data: Union[Dict, List], file_path: Union[str, Path], indent: int
     """
     Save data to JSON file.
     
+    Uses orjson when installed (indent 2 or None; numpy values are
+    serialized directly), otherwise the standard library.
+    
     Args:
         data: Data to save
         file_path: Output file path
         indent: JSON indentation
     """
+    if orjson is not None and indent in (None, 2):
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent == 2:
+            option |= orjson.OPT_INDENT_2
+        with open(file_path, 'wb') as f:
+            f.write(orjson.dumps(data, option=option))
+        return
+    
     with open(file_path, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=indent, ensure_ascii=False)
 
@@ -65,6 +85,16 @@ def load_json(file_path: Union[str, Path]) -> Union[Dict, List]:
     Returns:
         Loaded data
     """
+    if orjson is not None:
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # orjson rejects NaN/Infinity literals that the stdlib accepts
+            # (and writes); parse those files the way json.load would
+            return json.loads(raw.decode('utf-8'))
+    
     with open(file_path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
@@ -255,6 +285,63 @@ def chunk_list(lst: List, chunk_size: int) -> List[List]:
     return [lst[i:i + chunk_size] for i in range(0, len(lst), chunk_size)]
 
 
+@lru_cache(maxsize=None)
+def load_sentence_model(model_name: str, half_precision: bool = False):
+    """
+    Load a SentenceTransformer model once per process.
+    
+    The import and weight loading are deferred until the first call, and
+    later calls with the same arguments return the already-loaded instance.
+    Weights stay float32 by default: the similarity thresholds in the
+    compliance checker and scorer were tuned on float32 embeddings.
+    
+    Args:
+        model_name: SentenceTransformer model name or path
+        half_precision: Cast the weights to float16 when running on CUDA
+        
+    Returns:
+        SentenceTransformer instance
+    """
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(model_name)
+    if half_precision and model.device.type == "cuda":
+        model.half()
+    model.eval()
+    return model
+
+
+# Connection pool settings for the shared HTTP client. Sized above the
+# pipeline's peak concurrency (4 documents x 8 chunk workers, plus capability
+# and embedding workers) so requests never queue for a connection.
+HTTP_MAX_CONNECTIONS = 100
+HTTP_KEEPALIVE_EXPIRY = 300.0  # seconds an idle connection is kept open
+HTTP_TIMEOUT = 600.0  # read/write/pool timeout; same as the OpenAI client default
+HTTP_CONNECT_TIMEOUT = 5.0
+
+
+@lru_cache(maxsize=None)
+def get_http_client():
+    """
+    Shared httpx client for OpenAI clients.
+    
+    Idle connections are kept alive for HTTP_KEEPALIVE_EXPIRY seconds, so
+    requests after a pause reuse a warm TLS connection instead of paying
+    a new handshake.
+    
+    Returns:
+        httpx.Client instance (one per process)
+    """
+    import httpx
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+    )
+
+
 def get_project_root() -> Path:
     """
     Get project root directory.
@@ -294,6 +381,74 @@ def print_progress_bar(iteration: int,
         print()
 
 
+class RateLimiter:
+    """
+    Thread-safe token bucket over requests per minute and tokens per minute.
+    
+    Callers block in acquire() until both budgets allow the request, so a
+    batch of concurrent API calls is paced to the account quota instead of
+    running into 429 responses and retry backoff.
+    """
+    
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        """
+        Args:
+            requests_per_minute: Request budget (RPM)
+            tokens_per_minute: Token budget (TPM)
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests_available = float(requests_per_minute)
+        self._tokens_available = float(tokens_per_minute)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        minutes = (now - self._last_refill) / 60.0
+        self._last_refill = now
+        self._requests_available = min(
+            self.requests_per_minute,
+            self._requests_available + minutes * self.requests_per_minute
+        )
+        self._tokens_available = min(
+            self.tokens_per_minute,
+            self._tokens_available + minutes * self.tokens_per_minute
+        )
+    
+    def acquire(self, tokens: int = 0):
+        """
+        Block until one request using roughly `tokens` tokens fits the budget.
+        
+        Args:
+            tokens: Estimated prompt + completion tokens of the request
+        """
+        tokens = min(tokens, self.tokens_per_minute)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._requests_available >= 1 and self._tokens_available >= tokens:
+                    self._requests_available -= 1
+                    self._tokens_available -= tokens
+                    return
+                # Time until both buckets have refilled enough
+                wait = max(
+                    (1 - self._requests_available) * 60.0 / self.requests_per_minute,
+                    (tokens - self._tokens_available) * 60.0 / self.tokens_per_minute,
+                )
+            time.sleep(max(wait, 0.01))
+
+
+# Account quota for the OpenAI analysis model. All chat-completion callers
+# (chunk analyzer, vendor capability extractor) draw on one process-wide limiter.
+REQUESTS_PER_MINUTE = 500
+TOKENS_PER_MINUTE = 200_000
+COMPLETION_TOKENS_ESTIMATE = 800  # reserved per request for the JSON answer
+MAX_RETRIES = 5  # the OpenAI client retries 429/5xx with exponential backoff
+
+shared_rate_limiter = RateLimiter(REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE)
+
+
 class Timer:
     """Simple timer context manager."""
     
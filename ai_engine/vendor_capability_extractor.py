@@ -6,10 +6,22 @@ Integrates with the EVAL RFP Analysis System.
 
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Optional
 from openai import OpenAI
 from dotenv import load_dotenv
+from util import (
+    COMPLETION_TOKENS_ESTIMATE,
+    MAX_RETRIES,
+    RateLimiter,
+    count_tokens_estimate,
+    get_http_client,
+    load_json,
+    save_json,
+    shared_rate_limiter,
+)
+from llm_cache import LLMResponseCache, DEFAULT_CACHE_DIR
 
 
 # ----------------------------
@@ -17,12 +29,51 @@ from dotenv import load_dotenv
 # ----------------------------
 DEFAULT_MODEL = "gpt-4o-mini"
 DEFAULT_TEMPERATURE = 0
+DEFAULT_MAX_WORKERS = 8  # concurrent chunk analyses (I/O bound)
+
+# Structured output: decoding is constrained to this schema, so every
+# answer parses and no tokens are spent on malformed JSON
+_STRING_LIST = {"type": "array", "items": {"type": "string"}}
+CAPABILITY_ANALYSIS_SCHEMA = {
+    "name": "capability_analysis",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "capabilities": _STRING_LIST,
+            "commitments": _STRING_LIST,
+            "differentiators": _STRING_LIST,
+            "summary": {"type": "string"},
+            "evaluation_labels": _STRING_LIST,
+        },
+        "required": ["capabilities", "commitments", "differentiators", "summary", "evaluation_labels"],
+        "additionalProperties": False,
+    },
+}
+
+CAPABILITY_INSTRUCTIONS = """
+You are an expert in analyzing vendor proposals in response to RFPs.
+
+Your task is to extract all **capabilities**, **commitments/deliverables**, and **unique differentiators** that the vendor claims.
+You must categorize findings and summarize the text.
+
+Return valid JSON only in the following structure:
+{
+    "capabilities": [],
+    "commitments": [],
+    "differentiators": [],
+    "summary": "",
+    "evaluation_labels": []
+}
+"""
 
 
 class VendorCapabilityExtractor:
     """Extracts capabilities, commitments, and differentiators from vendor response chunks."""
 
-    def __init__(self, api_key: Optional[str] = None, model: str = DEFAULT_MODEL, temperature: float = DEFAULT_TEMPERATURE):
+    def __init__(self, api_key: Optional[str] = None, model: str = DEFAULT_MODEL, temperature: float = DEFAULT_TEMPERATURE,
+                 cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 rate_limiter: Optional[RateLimiter] = None):
         """
         Initialize the extractor.
         
@@ -30,6 +81,8 @@ class VendorCapabilityExtractor:
             api_key: OpenAI API key (if None, loads from .env)
             model: Model name to use
             temperature: Model temperature (0 = deterministic)
+            cache_dir: Directory of cached model responses (None disables caching)
+            rate_limiter: RPM/TPM limiter (defaults to the one shared with the chunk analyzer)
         """
         load_dotenv()
         api_key = api_key or os.getenv("OPENAI_API_KEY")
@@ -37,40 +90,48 @@ class VendorCapabilityExtractor:
         if not api_key:
             raise ValueError("OpenAI API key not found. Provide it directly or via .env")
 
-        self.client = OpenAI(api_key=api_key)
+        self.client = OpenAI(api_key=api_key, max_retries=MAX_RETRIES,
+                             http_client=get_http_client())
         self.model = model
         self.temperature = temperature
+        self.cache = LLMResponseCache(cache_dir) if cache_dir else None
+        self.rate_limiter = rate_limiter or shared_rate_limiter
 
     def analyze_chunk(self, chunk_text: str) -> Dict:
         """
         Analyze a single vendor chunk for capabilities, commitments, and differentiators.
         """
-        prompt = f"""
-You are an expert in analyzing vendor proposals in response to RFPs.
-
-Your task is to extract all **capabilities**, **commitments/deliverables**, and **unique differentiators** that the vendor claims.
-You must categorize findings and summarize the text.
-
-Return valid JSON only in the following structure:
-{{
-    "capabilities": [],
-    "commitments": [],
-    "differentiators": [],
-    "summary": "",
-    "evaluation_labels": []
-}}
-
-Analyze this vendor content:
-{chunk_text}
-"""
+        # Static instructions go first (system) so the API can serve that
+        # prefix from its prompt cache; only the user message varies per chunk
+        messages = [
+            {"role": "system", "content": CAPABILITY_INSTRUCTIONS},
+            {"role": "user", "content": f"Analyze this vendor content:\n{chunk_text}"},
+        ]
+        params = {
+            "temperature": self.temperature,
+            "response_format": {"type": "json_schema", "json_schema": CAPABILITY_ANALYSIS_SCHEMA},
+        }
+        # Unchanged chunks are answered from disk on re-runs
+        cache_key = self.cache.make_key(self.model, messages, **params) if self.cache else None
+        cached = self.cache.get(cache_key) if cache_key else None
+
+        content = cached
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=self.temperature,
-            )
-            content = response.choices[0].message.content
+            if content is None:
+                # Concurrent chunks are paced to stay under the account's RPM/TPM
+                self.rate_limiter.acquire(
+                    sum(count_tokens_estimate(m["content"]) for m in messages) + COMPLETION_TOKENS_ESTIMATE
+                )
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    **params,
+                )
+                content = response.choices[0].message.content
             result = json.loads(content)
+            # Only answers that parse are cached, so failures are retried next run
+            if cache_key and cached is None:
+                self.cache.set(cache_key, content)
         except Exception as e:
             print(f"⚠️ Error analyzing chunk: {e}")
             result = {
@@ -79,20 +140,22 @@ Analyze this vendor content:
                 "differentiators": [],
                 "summary": "",
                 "evaluation_labels": [],
-                "raw_model_output": content if 'content' in locals() else ""
+                "raw_model_output": content or ""
             }
         else:
             result["raw_model_output"] = content
 
         return result
 
-    def analyze_file(self, vendor_json_path: str, output_dir: Optional[str] = None) -> List[Dict]:
+    def analyze_file(self, vendor_json_path: str, output_dir: Optional[str] = None,
+                     max_workers: int = DEFAULT_MAX_WORKERS) -> List[Dict]:
         """
         Analyze all chunks in a single vendor JSON file.
         
         Args:
             vendor_json_path: Path to vendor chunks JSON
             output_dir: Directory to save the output file (default = same directory)
+            max_workers: Number of chunks analyzed concurrently
         
         Returns:
             List of analysis results
@@ -100,21 +163,22 @@ Analyze this vendor content:
         vendor_name = Path(vendor_json_path).stem.replace("_chunks", "")
         print(f"\n🔹 Analyzing vendor: {vendor_name}")
 
-        with open(vendor_json_path, "r", encoding="utf-8") as vf:
-            vendor_chunks = json.load(vf)
+        vendor_chunks = load_json(vendor_json_path)
+        texts = [c.get("contextualized_text") or c.get("text", "") for c in vendor_chunks]
+
+        def analyze(item):
+            i, text = item
+            print(f"   ↳ Chunk {i+1}/{len(texts)}")
+            return self.analyze_chunk(text)
 
-        results = []
-        for i, chunk in enumerate(vendor_chunks):
-            text = chunk.get("contextualized_text") or chunk.get("text", "")
-            print(f"   ↳ Chunk {i+1}/{len(vendor_chunks)}")
-            result = self.analyze_chunk(text)
-            results.append(result)
+        # Requests overlap on the network; map() keeps results in chunk order
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(analyze, enumerate(texts)))
 
         output_dir = Path(output_dir) if output_dir else Path(vendor_json_path).parent
         output_path = output_dir / f"{vendor_name}_capability_analysis.json"
 
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(results, f, indent=4, ensure_ascii=False)
+        save_json(results, output_path)
 
         print(f"✅ Saved capability analysis → {output_path}")
         return results
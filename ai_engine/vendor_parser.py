@@ -6,6 +6,7 @@ using the same chunking pipeline as RFP parsing.
 """
 
 import json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Union
 from parser import (
@@ -82,16 +83,25 @@ def process_multiple_vendors(
     output_dir: Union[str, Path],
     min_tokens: int = MIN_TOKENS,
     max_tokens: int = MAX_TOKENS,
+    workers: int = 1,
+    raise_on_error: bool = False,
 ) -> Dict[str, List[Dict]]:
     """
     Process multiple uploaded vendor files (kept same name for compatibility).
 
+    With workers > 1, files are parsed in separate processes (document
+    conversion is CPU-bound); each process loads its own models, so
+    memory grows with the worker count.
+
     Args:
         vendor_files: List of tuples (file_path, vendor_name)
                       Example: [("uploads/vendorA.pdf", "VendorA"), ("uploads/vendorB.docx", "VendorB")]
         output_dir: Directory to save output JSON files.
         min_tokens: Minimum tokens per chunk.
         max_tokens: Maximum tokens per chunk.
+        workers: Number of vendor files parsed in parallel processes.
+        raise_on_error: Re-raise a vendor's parse error instead of skipping
+                        that vendor (in parallel mode, once all files finish).
 
     Returns:
         Dictionary mapping vendor names to their processed chunks.
@@ -101,20 +111,45 @@ def process_multiple_vendors(
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
     results = {}
-
-    for file_path, vendor_name in vendor_files:
-        try:
-            chunks = process_vendor_response(
-                vendor_file_path=file_path,
-                vendor_name=vendor_name,
-                output_dir=output_dir,
-                min_tokens=min_tokens,
-                max_tokens=max_tokens,
-            )
-            results[vendor_name] = chunks
-        except Exception as e:
-            print(f"⚠️ Skipping {vendor_name} due to error: {e}")
-            continue
+    errors = []
+
+    if workers > 1 and len(vendor_files) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(vendor_files))) as executor:
+            futures = [
+                (vendor_name, executor.submit(
+                    process_vendor_response, file_path, vendor_name, output_dir, min_tokens, max_tokens
+                ))
+                for file_path, vendor_name in vendor_files
+            ]
+            # Collected in submission order, so results keep the input order
+            for vendor_name, future in futures:
+                try:
+                    results[vendor_name] = future.result()
+                except Exception as e:
+                    if raise_on_error:
+                        print(f"❌ Error processing {vendor_name}: {e}")
+                        errors.append(e)
+                    else:
+                        print(f"⚠️ Skipping {vendor_name} due to error: {e}")
+        if errors:
+            # First failing vendor in input order, as in the sequential path
+            raise errors[0]
+    else:
+        for file_path, vendor_name in vendor_files:
+            try:
+                chunks = process_vendor_response(
+                    vendor_file_path=file_path,
+                    vendor_name=vendor_name,
+                    output_dir=output_dir,
+                    min_tokens=min_tokens,
+                    max_tokens=max_tokens,
+                )
+                results[vendor_name] = chunks
+            except Exception as e:
+                if raise_on_error:
+                    raise
+                print(f"⚠️ Skipping {vendor_name} due to error: {e}")
+                continue
 
     print(f"\n🎯 Successfully processed {len(results)} vendor responses!")
     return results